@@ -1,24 +1,90 @@
+import io
 import uuid
-from fastapi import APIRouter, Body, Depends
-from fastapi.responses import FileResponse
+from urllib.parse import quote
+from fastapi import APIRouter, Body, Depends, Header, Request, UploadFile, File as UploadFileParam
+from fastapi.responses import FileResponse, StreamingResponse, Response, RedirectResponse
 from sqlalchemy.orm import Session
 from datetime import datetime
-from pathlib import Path
 
-from app.core.db import get_db
+from app.core.db import get_db, pool_status
 from app.core.security import require_admin, create_access_token
 from app.core.config import settings
 from app.core.exceptions import bad_request, not_found
+from app.core.responses import fast_json_response
+
+from app.models import ApplicationStatus, ChildStatus
+
+from app.schemas.application import ApplicationListResponse, ApplicationDetail, ChildView, ApplicationUIDS
+from app.schemas.admin import RejectApplicationRequest, ChildModerationRequest
+from app.repositories.application_repo import list_applications, get_application_detail, get_application_for_update, get_application_version, invalidate_registration_status, COUNT_MODES
+from app.repositories.file_repo import get_file_meta
+from app.repositories.audit_repo import bulk_add_audit, list_audit
+from app.repositories.search_repo import search_applications
+from app.services.application_service import set_children_status, reject_list_applications, accept_list_applications, make_new_list_applications, delete_list_applications
+from app.services.moderation_service import moderate_children
+from app.services.export_service import stream_export, EXPORT_FORMATS
+from app.services.documents_zip_service import stream_documents_zip
+from app.services.import_service import import_applications, IMPORT_FORMATS
+from app.services.stats_service import apply_deltas, status_change_deltas, get_stats
+from app.services.storage_service import file_etag, etag_matches, resolve_rel_path
+from app.services.storage_backend import get_storage
+from app.services.detail_service import detail_etag, cached_detail, store_detail, not_modified, detail_response, invalidate_application_detail
+from app.services.preview_service import ensure_preview, preview_mime, preview_rel_path, PREVIEW_SIZES
 
-from app.models import ApplicationStatus, AuditLog
+router = APIRouter(prefix="/admin", tags=["admin"])
 
-from app.schemas.application import ApplicationListResponse, ApplicationListItem, ApplicationDetail, ChildView, ApplicationUIDS
-from app.schemas.admin import RejectApplicationRequest
-from app.repositories.application_repo import list_applications, get_application_detail
-from app.repositories.file_repo import get_file
-from app.services.application_service import reject_list_applications, accept_list_applications, make_new_list_applications, delete_list_applications
 
-router = APIRouter(prefix="/admin", tags=["admin"])
+def build_list_response(total, page: int, per_page: int, rows, next_cursor) -> dict:
+    # тот же JSON, что давал ApplicationListResponse, но без pydantic на каждую строку
+    items = [
+        {
+            "id": r.id,
+            "full_name": r.full_name,
+            "whatsapp_phone": r.whatsapp_phone,
+            "is_investor": r.is_investor,
+            "objects": r.objects,
+            "contract_number": r.contract_number,
+            "children_total": r.children_total,
+            "children_coming": r.children_coming,
+            "email": r.email,
+            "status": r.status.value,
+            "created_at": r.created_at,
+        }
+        for r in rows
+    ]
+    return {"total": total, "page": page, "per_page": per_page, "items": items, "next_cursor": next_cursor}
+
+
+def build_application_detail(app) -> ApplicationDetail:
+    return ApplicationDetail(
+        id=app.id,
+        full_name=app.full_name,
+        whatsapp_phone=app.whatsapp_phone,
+        is_investor=app.is_investor,
+        objects=app.objects,
+        contract_number=app.contract_number,
+        children_total=app.children_total,
+        email=app.email,
+        children_coming=app.children_coming,
+        consent=app.consent,
+        status=app.status.value,
+        reject_reason=app.reject_reason,
+        created_at=app.created_at,
+        children=[
+            ChildView(
+                id=c.id,
+                full_name=c.full_name,
+                age=c.age,
+                path_image=(f"/admin/files/{c.birth_cert_file_id}"),
+                path_image2=(f"/admin/files/{c.birth_cert_file2_id}" if getattr(c, "birth_cert_file2_id", None) else None),
+                preview_image=(f"/admin/files/{c.birth_cert_file_id}/preview?size={PREVIEW_SIZES[0]}"),
+                preview_image2=(f"/admin/files/{c.birth_cert_file2_id}/preview?size={PREVIEW_SIZES[0]}" if getattr(c, "birth_cert_file2_id", None) else None),
+                status=c.status.value,
+                reject_reason=c.reject_reason,
+            )
+            for c in app.children
+        ],
+    )
 
 
 @router.post("/auth/login")
@@ -34,6 +100,7 @@ def admin_login(body: dict):
 
 @router.get("/applications", response_model=ApplicationListResponse)
 def admin_list_applications(
+    request: Request,
     page: int = 1,
     per_page: int = 3000,
     status: str | None = None,
@@ -43,98 +110,276 @@ def admin_list_applications(
     created_from: str | None = None,
     created_to: str | None = None,
     email: str | None = None,
+    cursor: str | None = None,
+    count: str = "exact",
     db: Session = Depends(get_db),
     actor: str = Depends(require_admin),
 ):
+    # cursor="" — первая страница в keyset-режиме, дальше передаём next_cursor
+    # count: exact | cached | estimate | none
     if page < 1 or per_page < 1 or per_page > 3500:
         raise bad_request("Invalid pagination")
+    if count not in COUNT_MODES:
+        raise bad_request("Invalid count mode")
 
     dt_from = datetime.fromisoformat(created_from) if created_from else None
     dt_to = datetime.fromisoformat(created_to) if created_to else None
 
-    total, rows = list_applications(
-        db=db,
-        page=page,
-        per_page=per_page,
+    try:
+        total, rows, next_cursor = list_applications(
+            db=db,
+            page=page,
+            per_page=per_page,
+            status=status,
+            is_investor=is_investor,
+            object_value=object,
+            email=email,
+            phone_search=phone_search,
+            created_from=dt_from,
+            created_to=dt_to,
+            cursor=cursor,
+            count_mode=count,
+        )
+    except ValueError:
+        raise bad_request("Invalid cursor")
+
+    return fast_json_response(build_list_response(total, page, per_page, rows, next_cursor), request)
+
+
+@router.get("/stats")
+def admin_stats(db: Session = Depends(get_db), actor: str = Depends(require_admin)):
+    return get_stats(db)
+
+
+@router.get("/search")
+def admin_search(
+    request: Request,
+    q: str,
+    limit: int = 20,
+    db: Session = Depends(get_db),
+    actor: str = Depends(require_admin),
+):
+    # q — ФИО родителя/ребёнка (можно часть), email или телефон в любом формате
+    if len(q.strip()) < 2:
+        raise bad_request("Query is too short")
+    if limit < 1 or limit > 100:
+        raise bad_request("Invalid limit")
+
+    items = [
+        {
+            "id": r.id,
+            "full_name": r.full_name,
+            "email": r.email,
+            "whatsapp_phone": r.whatsapp_phone,
+            "status": r.status,
+            "created_at": r.created_at,
+            "matched_field": r.matched_field,
+            "matched_value": r.matched_value,
+            "score": round(r.score, 4),
+        }
+        for r in search_applications(db, q, limit)
+    ]
+    return fast_json_response({"items": items}, request)
+
+
+@router.get("/audit")
+def admin_audit(
+    request: Request,
+    limit: int = 100,
+    cursor: str | None = None,
+    actor: str | None = None,
+    entity_type: str | None = None,
+    entity_id: str | None = None,
+    action: str | None = None,
+    created_from: str | None = None,
+    created_to: str | None = None,
+    db: Session = Depends(get_db),
+    _: str = Depends(require_admin),
+):
+    # cursor — next_cursor из предыдущего ответа
+    if limit < 1 or limit > 1000:
+        raise bad_request("Invalid limit")
+
+    try:
+        rows, next_cursor = list_audit(
+            db,
+            limit=limit,
+            cursor=cursor,
+            actor=actor,
+            entity_type=entity_type,
+            entity_id=entity_id,
+            action=action,
+            created_from=datetime.fromisoformat(created_from) if created_from else None,
+            created_to=datetime.fromisoformat(created_to) if created_to else None,
+        )
+    except ValueError:
+        raise bad_request("Invalid cursor or date")
+
+    items = [
+        {
+            "id": r.id,
+            "actor": r.actor,
+            "entity_type": r.entity_type,
+            "entity_id": r.entity_id,
+            "action": r.action,
+            "payload": r.payload,
+            "created_at": r.created_at,
+        }
+        for r in rows
+    ]
+    return fast_json_response({"items": items, "next_cursor": next_cursor}, request)
+
+
+@router.get("/db/pool")
+def admin_db_pool(actor: str = Depends(require_admin)):
+    return pool_status()
+
+
+@router.get("/applications/export")
+def admin_export_applications(
+    format: str = "csv",
+    status: str | None = None,
+    is_investor: bool | None = None,
+    object: str | None = None,
+    phone_search: str | None = None,
+    created_from: str | None = None,
+    created_to: str | None = None,
+    email: str | None = None,
+    actor: str = Depends(require_admin),
+):
+    if format not in EXPORT_FORMATS:
+        raise bad_request("Invalid export format. Allowed: csv, ndjson")
+
+    filters = dict(
         status=status,
         is_investor=is_investor,
         object_value=object,
+        phone_search=phone_search,
+        created_from=datetime.fromisoformat(created_from) if created_from else None,
+        created_to=datetime.fromisoformat(created_to) if created_to else None,
         email=email,
+    )
+
+    media_type = "text/csv; charset=utf-8" if format == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        stream_export(format, filters),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="applications.{format}"'},
+    )
+
+
+def _zip_response(stream):
+    return StreamingResponse(
+        stream,
+        media_type="application/zip",
+        headers={"Content-Disposition": 'attachment; filename="documents.zip"'},
+    )
+
+
+@router.get("/applications/documents")
+def admin_download_documents(
+    status: str | None = None,
+    is_investor: bool | None = None,
+    object: str | None = None,
+    phone_search: str | None = None,
+    created_from: str | None = None,
+    created_to: str | None = None,
+    email: str | None = None,
+    actor: str = Depends(require_admin),
+):
+    # те же фильтры, что у списка/экспорта; архив собирается на лету
+    filters = dict(
+        status=status,
+        is_investor=is_investor,
+        object_value=object,
         phone_search=phone_search,
-        created_from=dt_from,
-        created_to=dt_to,
+        created_from=datetime.fromisoformat(created_from) if created_from else None,
+        created_to=datetime.fromisoformat(created_to) if created_to else None,
+        email=email,
     )
+    return _zip_response(stream_documents_zip(filters))
 
-    items = [
-        ApplicationListItem(
-            id=r.id,
-            full_name=r.full_name,
-            whatsapp_phone=r.whatsapp_phone,
-            is_investor=r.is_investor,
-            objects=r.objects,
-            email=r.email,
-            contract_number=r.contract_number,
-            children_total=r.children_total,
-            children_coming=r.children_coming,
-            status=r.status.value,
-            created_at=r.created_at,
-        )
-        for r in rows
-    ]
-    return ApplicationListResponse(total=total, page=page, per_page=per_page, items=items)
+
+@router.post("/applications-list/documents")
+def admin_list_download_documents(
+    payload: ApplicationUIDS = Body(...),
+    actor: str = Depends(require_admin),
+):
+    if not payload.uid_list:
+        raise bad_request("uid_list is empty")
+    return _zip_response(stream_documents_zip({}, ids=list(dict.fromkeys(payload.uid_list))))
+
+
+@router.post("/applications/import")
+def admin_import_applications(
+    file: UploadFile = UploadFileParam(...),
+    format: str = "csv",
+    status: str = ApplicationStatus.NEW.value,
+    db: Session = Depends(get_db),
+    actor: str = Depends(require_admin),
+):
+    if format not in IMPORT_FORMATS:
+        raise bad_request("Invalid import format. Allowed: csv, ndjson")
+    try:
+        app_status = ApplicationStatus(status)
+    except ValueError:
+        raise bad_request("Invalid status")
+
+    stream = io.TextIOWrapper(file.file, encoding="utf-8-sig", newline="")
+    try:
+        return import_applications(db, stream, format, app_status, actor)
+    except ValueError as e:
+        raise bad_request(str(e))
 
 
 @router.get("/applications/{app_id}", response_model=ApplicationDetail)
-def admin_get_application(app_id: uuid.UUID, db: Session = Depends(get_db), actor: str = Depends(require_admin)):
-    app = get_application_detail(db, app_id)
-    if not app:
+def admin_get_application(
+    app_id: uuid.UUID,
+    if_none_match: str | None = Header(default=None),
+    db: Session = Depends(get_db),
+    actor: str = Depends(require_admin),
+):
+    version = get_application_version(db, app_id)
+    if not version:
         raise not_found("Application not found")
 
-    return ApplicationDetail(
-        id=app.id,
-        full_name=app.full_name,
-        whatsapp_phone=app.whatsapp_phone,
-        is_investor=app.is_investor,
-        objects=app.objects,
-        contract_number=app.contract_number,
-        children_total=app.children_total,
-        email=app.email,
-        children_coming=app.children_coming,
-        consent=app.consent,
-        status=app.status.value,
-        reject_reason=app.reject_reason,
-        created_at=app.created_at,
-        children=[
-            ChildView(
-                id=c.id,
-                full_name=c.full_name,
-                age=c.age,
-                path_image=(f"/admin/files/{c.birth_cert_file_id}"),
-                path_image2=(f"/admin/files/{c.birth_cert_file2_id}" if getattr(c, "birth_cert_file2_id", None) else None),
-            )
-            for c in app.children
-        ],
-    )
+    etag = detail_etag(app_id, version)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+
+    body = cached_detail(app_id, etag)
+    if body is None:
+        app = get_application_detail(db, app_id)
+        if not app:
+            raise not_found("Application not found")
+        body = build_application_detail(app).model_dump_json().encode()
+        store_detail(app_id, etag, body)
+
+    return detail_response(body, etag)
 
 
 @router.post("/applications/{app_id}/approve")
 def admin_approve_application(app_id: uuid.UUID, db: Session = Depends(get_db), actor: str = Depends(require_admin)):
-    app = get_application_detail(db, app_id)
+    app = get_application_for_update(db, app_id)
     if not app:
         raise not_found("Application not found")
 
+    apply_deltas(db, status_change_deltas(app.status, ApplicationStatus.APPROVED, app.children_coming))
     app.status = ApplicationStatus.APPROVED
     app.reject_reason = None
+    set_children_status(db, [app.id], ApplicationStatus.APPROVED, None, actor)
 
-    db.add(AuditLog(
+    bulk_add_audit(db, [dict(
         actor=actor,
         entity_type="application",
         entity_id=str(app.id),
         action="approve",
         payload={},
-    ))
+    )])
 
     db.commit()
+    invalidate_registration_status(app.email)
+    invalidate_application_detail(app.id)
     return {"ok": True}
 
 
@@ -145,22 +390,26 @@ def admin_reject_application(
     db: Session = Depends(get_db),
     actor: str = Depends(require_admin),
 ):
-    app = get_application_detail(db, app_id)
+    app = get_application_for_update(db, app_id)
     if not app:
         raise not_found("Application not found")
 
+    apply_deltas(db, status_change_deltas(app.status, ApplicationStatus.REJECTED, app.children_coming))
     app.status = ApplicationStatus.REJECTED
     app.reject_reason = payload.reason
+    set_children_status(db, [app.id], ApplicationStatus.REJECTED, payload.reason, actor)
 
-    db.add(AuditLog(
+    bulk_add_audit(db, [dict(
         actor=actor,
         entity_type="application",
         entity_id=str(app.id),
         action="reject",
         payload={"reason": payload.reason},
-    ))
+    )])
 
     db.commit()
+    invalidate_registration_status(app.email)
+    invalidate_application_detail(app.id)
     return {"ok": True}
 
 
@@ -170,7 +419,7 @@ def admin_list_reject_applications(
     db: Session = Depends(get_db),
     actor: str = Depends(require_admin)
 ):
-    errors = reject_list_applications(db, payload.uid_list)
+    errors = reject_list_applications(db, payload.uid_list, actor)
     return {"errors": errors} if errors else {"ok": True}
 
 
@@ -180,7 +429,7 @@ def admin_list_accept_applications(
     db: Session = Depends(get_db),
     actor: str = Depends(require_admin)
 ):
-    errors = accept_list_applications(db, payload.uid_list)
+    errors = accept_list_applications(db, payload.uid_list, actor)
     return {"errors": errors} if errors else {"ok": True}
 
 
@@ -200,19 +449,90 @@ def admin_list_new_applications(
     db: Session = Depends(get_db),
     actor: str = Depends(require_admin)
 ):
-    errors = make_new_list_applications(db, payload.uid_list)
+    errors = make_new_list_applications(db, payload.uid_list, actor)
+    return {"errors": errors} if errors else {"ok": True}
+
+
+@router.patch('/children/moderate')
+def admin_moderate_children(
+    payload: ChildModerationRequest = Body(...),
+    db: Session = Depends(get_db),
+    actor: str = Depends(require_admin)
+):
+    decisions = [
+        (d.child_id, ChildStatus.APPROVED if d.decision == "approve" else ChildStatus.REJECTED, d.reason)
+        for d in payload.decisions
+    ]
+    errors = moderate_children(db, decisions, actor)
     return {"errors": errors} if errors else {"ok": True}
 
 
+def send_stored_file(rel_path: str, mime: str, filename: str, etag: str | None, if_none_match: str | None):
+    storage = get_storage()
+
+    headers = {"Cache-Control": f"private, max-age={settings.FILES_CACHE_MAX_AGE}"}
+    if etag:
+        headers["ETag"] = etag
+        if etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers=headers)
+
+    url = storage.presigned_url(rel_path, filename, mime)
+    if url is not None:
+        # байты отдаёт хранилище; ссылка живёт S3_PRESIGN_TTL_SECONDS, поэтому редирект не кэшируем
+        return RedirectResponse(url, status_code=302, headers={"Cache-Control": "private, no-store"})
+
+    if settings.FILES_X_ACCEL_REDIRECT:
+        # байты отдаёт nginx из internal location (он же обрабатывает Range)
+        headers["X-Accel-Redirect"] = settings.FILES_X_ACCEL_PREFIX + quote(rel_path)
+        headers["Content-Disposition"] = f"attachment; filename*=utf-8''{quote(filename)}"
+        return Response(media_type=mime, headers=headers)
+
+    abs_path = storage.local_root / rel_path
+    if not abs_path.exists():
+        raise not_found("File missing on disk")
+
+    # FileResponse сам обрабатывает Range/If-Range; ETag берёт наш
+    return FileResponse(path=str(abs_path), media_type=mime, filename=filename, headers=headers)
+
+
 @router.get("/files/{file_id}")
-def admin_get_file(file_id: uuid.UUID, db: Session = Depends(get_db), actor: str = Depends(require_admin)):
-    f = get_file(db, file_id)
+def admin_get_file(
+    file_id: uuid.UUID,
+    if_none_match: str | None = Header(default=None),
+    db: Session = Depends(get_db),
+    actor: str = Depends(require_admin),
+):
+    f = get_file_meta(db, file_id)
     if not f:
         raise not_found("File not found")
 
-    abs_path = Path(settings.STORAGE_ROOT) / f.storage_path
-    if not abs_path.exists():
-        raise not_found("File missing on disk")
+    storage_path = resolve_rel_path(f.storage_path)
+    etag = file_etag(f.digest, storage_path)
+    return send_stored_file(storage_path, f.mime, f.original_name, etag, if_none_match)
+
+
+@router.get("/files/{file_id}/preview")
+def admin_get_file_preview(
+    file_id: uuid.UUID,
+    size: int = PREVIEW_SIZES[0],
+    if_none_match: str | None = Header(default=None),
+    db: Session = Depends(get_db),
+    actor: str = Depends(require_admin),
+):
+    if size not in PREVIEW_SIZES:
+        raise bad_request(f"Invalid preview size. Allowed: {', '.join(map(str, PREVIEW_SIZES))}")
+
+    f = get_file_meta(db, file_id)
+    if not f:
+        raise not_found("File not found")
 
-    return FileResponse(path=str(abs_path), media_type=f.mime, filename=f.original_name)
+    storage_path = resolve_rel_path(f.storage_path)
+    preview = ensure_preview(storage_path, f.mime, size)
+    if preview is None:
+        # pdf или превью не получилось — отдаём оригинал
+        etag = file_etag(f.digest, storage_path)
+        return send_stored_file(storage_path, f.mime, f.original_name, etag, if_none_match)
 
+    rel = preview_rel_path(storage_path, size)
+    etag = f'"{f.digest}-{size}-{settings.PREVIEW_FORMAT}"' if f.digest else file_etag(None, rel)
+    return send_stored_file(rel, preview_mime(), f"{f.original_name}.{size}.{settings.PREVIEW_FORMAT}", etag, if_none_match)
@@ -0,0 +1,150 @@
+"""
+Async-версии читающих админских роутов (DB_ASYNC=true). Изменяющие роуты
+остаются в app.api.admin: они короткие и держат блокировки строк.
+"""
+import uuid
+from datetime import datetime
+from fastapi import APIRouter, Depends, Header, Request
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.db import get_async_db
+from app.core.security import require_admin
+from app.core.config import settings
+from app.core.exceptions import bad_request, not_found
+from app.core.responses import fast_json_response
+from app.models import StatsCounter
+from app.schemas.application import ApplicationListResponse, ApplicationDetail
+from app.api.admin import build_list_response, build_application_detail, send_stored_file
+from app.repositories.application_repo import COUNT_MODES
+from app.repositories.aio.application_repo import list_applications, get_application_detail, get_application_version
+from app.repositories.aio.file_repo import get_file_meta
+from app.services.storage_service import file_etag, etag_matches, resolve_rel_path
+from app.services.detail_service import detail_etag, cached_detail, store_detail, not_modified, detail_response
+from app.services.preview_service import ensure_preview, preview_mime, preview_rel_path, PREVIEW_SIZES
+from app.services.stats_service import stats_from_rows
+
+router = APIRouter(prefix="/admin", tags=["admin"])
+
+
+@router.get("/stats")
+async def admin_stats(db: AsyncSession = Depends(get_async_db), actor: str = Depends(require_admin)):
+    rows = (await db.execute(select(StatsCounter.key, StatsCounter.value))).all()
+    return stats_from_rows(rows)
+
+
+@router.get("/applications", response_model=ApplicationListResponse)
+async def admin_list_applications(
+    request: Request,
+    page: int = 1,
+    per_page: int = 3000,
+    status: str | None = None,
+    is_investor: bool | None = None,
+    object: str | None = None,
+    phone_search: str | None = None,
+    created_from: str | None = None,
+    created_to: str | None = None,
+    email: str | None = None,
+    cursor: str | None = None,
+    count: str = "exact",
+    db: AsyncSession = Depends(get_async_db),
+    actor: str = Depends(require_admin),
+):
+    if page < 1 or per_page < 1 or per_page > 3500:
+        raise bad_request("Invalid pagination")
+    if count not in COUNT_MODES:
+        raise bad_request("Invalid count mode")
+
+    dt_from = datetime.fromisoformat(created_from) if created_from else None
+    dt_to = datetime.fromisoformat(created_to) if created_to else None
+
+    try:
+        total, rows, next_cursor = await list_applications(
+            db=db,
+            page=page,
+            per_page=per_page,
+            status=status,
+            is_investor=is_investor,
+            object_value=object,
+            email=email,
+            phone_search=phone_search,
+            created_from=dt_from,
+            created_to=dt_to,
+            cursor=cursor,
+            count_mode=count,
+        )
+    except ValueError:
+        raise bad_request("Invalid cursor")
+
+    return fast_json_response(build_list_response(total, page, per_page, rows, next_cursor), request)
+
+
+@router.get("/applications/{app_id}", response_model=ApplicationDetail)
+async def admin_get_application(
+    app_id: uuid.UUID,
+    if_none_match: str | None = Header(default=None),
+    db: AsyncSession = Depends(get_async_db),
+    actor: str = Depends(require_admin),
+):
+    version = await get_application_version(db, app_id)
+    if not version:
+        raise not_found("Application not found")
+
+    etag = detail_etag(app_id, version)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+
+    body = cached_detail(app_id, etag)
+    if body is None:
+        app = await get_application_detail(db, app_id)
+        if not app:
+            raise not_found("Application not found")
+        body = build_application_detail(app).model_dump_json().encode()
+        store_detail(app_id, etag, body)
+
+    return detail_response(body, etag)
+
+
+@router.get("/files/{file_id}")
+async def admin_get_file(
+    file_id: uuid.UUID,
+    if_none_match: str | None = Header(default=None),
+    db: AsyncSession = Depends(get_async_db),
+    actor: str = Depends(require_admin),
+):
+    f = await get_file_meta(db, file_id)
+    if not f:
+        raise not_found("File not found")
+
+    # с S3 это HeadObject: уводим с event loop
+    storage_path = await run_in_threadpool(resolve_rel_path, f.storage_path)
+    etag = await run_in_threadpool(file_etag, f.digest, storage_path)
+    return send_stored_file(storage_path, f.mime, f.original_name, etag, if_none_match)
+
+
+@router.get("/files/{file_id}/preview")
+async def admin_get_file_preview(
+    file_id: uuid.UUID,
+    size: int = PREVIEW_SIZES[0],
+    if_none_match: str | None = Header(default=None),
+    db: AsyncSession = Depends(get_async_db),
+    actor: str = Depends(require_admin),
+):
+    if size not in PREVIEW_SIZES:
+        raise bad_request(f"Invalid preview size. Allowed: {', '.join(map(str, PREVIEW_SIZES))}")
+
+    f = await get_file_meta(db, file_id)
+    if not f:
+        raise not_found("File not found")
+
+    storage_path = await run_in_threadpool(resolve_rel_path, f.storage_path)
+    # ожидание рендера в пуле процессов — блокирующее
+    preview = await run_in_threadpool(ensure_preview, storage_path, f.mime, size)
+    if preview is None:
+        etag = await run_in_threadpool(file_etag, f.digest, storage_path)
+        return send_stored_file(storage_path, f.mime, f.original_name, etag, if_none_match)
+
+    rel = preview_rel_path(storage_path, size)
+    etag = f'"{f.digest}-{size}-{settings.PREVIEW_FORMAT}"' if f.digest else await run_in_threadpool(file_etag, None, rel)
+    return send_stored_file(rel, preview_mime(), f"{f.original_name}.{size}.{settings.PREVIEW_FORMAT}", etag, if_none_match)
@@ -0,0 +1,88 @@
+"""Async-версии публичных роутов (DB_ASYNC=true), подключаются вместо app.api.public."""
+import uuid
+from fastapi import APIRouter, Depends, UploadFile, File as UploadFileParam, Form, Query
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.db import get_async_db
+from app.core.exceptions import bad_request
+from app.schemas.application import ApplicationCreateResponse
+from app.api.public import parse_submission, build_application
+from app.repositories.application_repo import invalidate_registration_status
+from app.repositories.aio.application_repo import create_application, get_registration_status_by_email
+from app.repositories.aio.file_repo import create_file
+from app.services.storage_service import save_upload, file_entity
+from app.services.preview_service import schedule_previews
+from app.services.job_service import enqueue_confirmation
+from app.services.stats_service import deltas_statement, application_deltas
+
+
+router = APIRouter(prefix="/public", tags=["public"])
+
+
+async def _store_upload(db: AsyncSession, upload: UploadFile):
+    # запись на диск блокирующая — уносим в threadpool, event loop остаётся свободным
+    file_id = uuid.uuid4()
+    rel, size, digest = await run_in_threadpool(save_upload, file_id, upload)
+    fe = file_entity(file_id, rel, upload, size, digest)
+    await create_file(db, fe)
+    return fe
+
+
+@router.post("/applications", response_model=ApplicationCreateResponse)
+async def create_application_public(
+    payload: str = Form(...),
+
+    # старый формат
+    files: list[UploadFile] | None = UploadFileParam(default=None),
+
+    # новый формат
+    files1: list[UploadFile] | None = UploadFileParam(default=None),
+    files2: list[UploadFile] | None = UploadFileParam(default=None),
+
+    db: AsyncSession = Depends(get_async_db),
+):
+    dto, f1_list, f2_list = parse_submission(payload, files, files1, files2)
+    app = build_application(dto)
+
+    await create_application(db, app)
+
+    saved = []
+    for idx, child in enumerate(app.children):
+        fe1 = await _store_upload(db, f1_list[idx])
+        child.birth_cert_file_id = fe1.id
+        saved.append((fe1.storage_path, fe1.mime))
+
+        if f2_list[idx] is not None:
+            fe2 = await _store_upload(db, f2_list[idx])
+            child.birth_cert_file2_id = fe2.id
+            saved.append((fe2.storage_path, fe2.mime))
+
+    stmt = deltas_statement(application_deltas(app.status, app.is_investor, app.objects, app.children_coming))
+    if stmt is not None:
+        await db.execute(stmt)
+    # в той же транзакции: откат заявки — нет уведомления
+    enqueue_confirmation(db, app)
+    await db.commit()
+    invalidate_registration_status(dto.email)
+    schedule_previews(saved)
+    return ApplicationCreateResponse(application_id=app.id, status=app.status.value)
+
+
+@router.get("/registrations/check")
+async def check_registration(
+    email: str = Query(..., min_length=3),
+    db: AsyncSession = Depends(get_async_db),
+):
+    if not email:
+        raise bad_request("email required")
+
+    status = await get_registration_status_by_email(db, email)
+
+    if not status:
+        return {"registered": False}
+
+    return {
+        "registered": True,
+        "status": status  # APPROVED / NEW / REJECTED
+    }
@@ -7,38 +7,33 @@ from app.core.db import get_db
 from app.core.exceptions import bad_request
 from app.models import Application, Child
 from app.schemas.application import ApplicationCreate, ApplicationCreateResponse
-from app.repositories.application_repo import create_application, get_registration_status_by_email
+from app.repositories.application_repo import create_application, get_registration_status_by_email, invalidate_registration_status
 from app.repositories.file_repo import create_file
-from app.services.storage_service import validate_upload, save_upload_to_disk, file_entity
+from app.services.storage_service import validate_upload, save_upload, file_entity
+from app.services.preview_service import schedule_previews
+from app.services.job_service import enqueue_confirmation
+from app.services.stats_service import apply_deltas, application_deltas
+from app.services.application_service import application_rule_error
 
 
 router = APIRouter(prefix="/public", tags=["public"])
 
 
-@router.post("/applications", response_model=ApplicationCreateResponse)
-def create_application_public(
-    payload: str = Form(...),
-
-    # старый формат
-    files: list[UploadFile] | None = UploadFileParam(default=None),
-
-    # новый формат
-    files1: list[UploadFile] | None = UploadFileParam(default=None),
-    files2: list[UploadFile] | None = UploadFileParam(default=None),
-
-    db: Session = Depends(get_db),
-):
+def parse_submission(
+    payload: str,
+    files: list[UploadFile] | None,
+    files1: list[UploadFile] | None,
+    files2: list[UploadFile] | None,
+) -> tuple[ApplicationCreate, list[UploadFile], list[UploadFile | None]]:
+    """Валидирует payload и файлы (общая часть sync и async роутов). Возвращает (dto, files1, files2)."""
     try:
         dto = ApplicationCreate.model_validate(json.loads(payload))
     except Exception:
         raise bad_request("Invalid payload JSON")
 
-    if dto.children_coming > dto.children_total:
-        raise bad_request("children_coming must be <= children_total")
-    if not dto.consent:
-        raise bad_request("consent must be true")
-    if dto.is_investor and len(dto.objects) == 0:
-        raise bad_request("objects must be non-empty for investor")
+    error = application_rule_error(dto)
+    if error:
+        raise bad_request(error)
 
     # нормализуем вход к двум массивам
     if files1 is None and files2 is None:
@@ -71,6 +66,10 @@ def create_application_public(
         if f is not None:
             validate_upload(f)
 
+    return dto, f1_list, f2_list
+
+
+def build_application(dto: ApplicationCreate) -> Application:
     app = Application(
         email=dto.email,
         full_name=dto.full_name,
@@ -86,28 +85,55 @@ def create_application_public(
     for c in dto.children:
         app.children.append(Child(full_name=c.full_name, age=c.age))
 
+    return app
+
+
+@router.post("/applications", response_model=ApplicationCreateResponse)
+def create_application_public(
+    payload: str = Form(...),
+
+    # старый формат
+    files: list[UploadFile] | None = UploadFileParam(default=None),
+
+    # новый формат
+    files1: list[UploadFile] | None = UploadFileParam(default=None),
+    files2: list[UploadFile] | None = UploadFileParam(default=None),
+
+    db: Session = Depends(get_db),
+):
+    dto, f1_list, f2_list = parse_submission(payload, files, files1, files2)
+    app = build_application(dto)
+
     create_application(db, app)
     db.flush()
 
+    saved = []
     for idx, child in enumerate(app.children):
         # файл 1 (всегда)
         upload1 = f1_list[idx]
         file_id1 = uuid.uuid4()
-        rel1, size1 = save_upload_to_disk(file_id1, upload1)
-        fe1 = file_entity(file_id1, rel1, upload1, size1)
+        rel1, size1, digest1 = save_upload(file_id1, upload1)
+        fe1 = file_entity(file_id1, rel1, upload1, size1, digest1)
         create_file(db, fe1)
         child.birth_cert_file_id = fe1.id
+        saved.append((fe1.storage_path, fe1.mime))
 
         # файл 2 (опционально)
         upload2 = f2_list[idx]
         if upload2 is not None:
             file_id2 = uuid.uuid4()
-            rel2, size2 = save_upload_to_disk(file_id2, upload2)
-            fe2 = file_entity(file_id2, rel2, upload2, size2)
+            rel2, size2, digest2 = save_upload(file_id2, upload2)
+            fe2 = file_entity(file_id2, rel2, upload2, size2, digest2)
             create_file(db, fe2)
             child.birth_cert_file2_id = fe2.id
+            saved.append((fe2.storage_path, fe2.mime))
 
+    apply_deltas(db, application_deltas(app.status, app.is_investor, app.objects, app.children_coming))
+    # в той же транзакции: откат заявки — нет уведомления
+    enqueue_confirmation(db, app)
     db.commit()
+    invalidate_registration_status(dto.email)
+    schedule_previews(saved)
     return ApplicationCreateResponse(application_id=app.id, status=app.status.value)
 
 
@@ -0,0 +1,121 @@
+"""
+Служебные команды: python -m app.cli <command>
+"""
+import argparse
+
+from app.core.config import settings
+from app.core.db import SessionLocal
+
+
+def cmd_stats_rebuild(args):
+    from app.services.stats_service import rebuild_stats, get_stats
+
+    db = SessionLocal()
+    try:
+        rebuild_stats(db)
+        print(get_stats(db))
+    finally:
+        db.close()
+
+
+def cmd_import_applications(args):
+    from app.models import ApplicationStatus
+    from app.services.import_service import import_applications
+
+    fmt = args.format or ("ndjson" if args.path.endswith((".ndjson", ".jsonl")) else "csv")
+    db = SessionLocal()
+    try:
+        with open(args.path, encoding="utf-8-sig", newline="") as stream:
+            report = import_applications(db, stream, fmt, ApplicationStatus(args.status), args.actor)
+    finally:
+        db.close()
+    for e in report["errors"]:
+        print(f"row {e['row']}: {e['error']}")
+    print(f"inserted={report['inserted']} skipped={report['skipped']} errors={report['errors_total']}")
+
+
+def cmd_audit_partitions(args):
+    from datetime import datetime
+    from app.services.audit_service import ensure_partitions, drop_partitions_before, add_months, month_start
+
+    db = SessionLocal()
+    try:
+        for name in ensure_partitions(db, args.ahead):
+            print(f"created {name}")
+        if args.retain_months > 0:
+            cutoff = add_months(month_start(datetime.utcnow().date()), -args.retain_months)
+            for name in drop_partitions_before(db, cutoff):
+                print(f"dropped {name}")
+    finally:
+        db.close()
+
+
+def _require_local_storage():
+    from app.services.storage_backend import get_storage
+
+    if get_storage().local_root is None:
+        raise SystemExit("command works only with STORAGE_BACKEND=local")
+
+
+def cmd_storage_migrate_layout(args):
+    from app.services.storage_layout_service import migrate_flat_layout
+
+    _require_local_storage()
+    db = SessionLocal()
+    try:
+        report = migrate_flat_layout(db, batch_size=args.batch_size, sleep=args.sleep, dry_run=args.dry_run)
+    finally:
+        db.close()
+    prefix = "would move" if args.dry_run else "moved"
+    print(f"{prefix}: files={report['files']} paths={report['paths']} missing={report['missing']}")
+
+
+def cmd_storage_gc(args):
+    from app.services.storage_gc_service import StorageGC
+
+    _require_local_storage()
+    db = SessionLocal()
+    try:
+        report = StorageGC(db, mode=args.mode, batch_size=args.batch_size, grace_hours=args.grace_hours).run()
+    finally:
+        db.close()
+    print(" ".join(f"{k}={v}" for k, v in report.items()))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m app.cli")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("stats-rebuild", help="пересчитать stats_counters с нуля")
+    p.set_defaults(func=cmd_stats_rebuild)
+
+    p = sub.add_parser("import-applications", help="импорт заявок из CSV/NDJSON через COPY")
+    p.add_argument("path")
+    p.add_argument("--format", choices=["csv", "ndjson"])
+    p.add_argument("--status", default="NEW", choices=["NEW", "APPROVED", "REJECTED"])
+    p.add_argument("--actor", default="cli")
+    p.set_defaults(func=cmd_import_applications)
+
+    p = sub.add_parser("audit-partitions", help="создать будущие секции audit_log и удалить старые")
+    p.add_argument("--ahead", type=int, default=settings.AUDIT_PARTITIONS_AHEAD)
+    p.add_argument("--retain-months", type=int, default=settings.AUDIT_RETENTION_MONTHS)
+    p.set_defaults(func=cmd_audit_partitions)
+
+    p = sub.add_parser("storage-migrate-layout", help="перенести файлы из плоского birth_certs в birth_certs/ab/cd/")
+    p.add_argument("--batch-size", type=int, default=500)
+    p.add_argument("--sleep", type=float, default=0.0, help="пауза между пачками, сек")
+    p.add_argument("--dry-run", action="store_true")
+    p.set_defaults(func=cmd_storage_migrate_layout)
+
+    p = sub.add_parser("storage-gc", help="найти и убрать файлы/строки files, на которые никто не ссылается")
+    p.add_argument("--mode", choices=["dry-run", "quarantine", "delete"], default="dry-run")
+    p.add_argument("--batch-size", type=int, default=1000)
+    p.add_argument("--grace-hours", type=float, default=None, help="по умолчанию STORAGE_GC_GRACE_HOURS")
+    p.set_defaults(func=cmd_storage_gc)
+
+    args = parser.parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
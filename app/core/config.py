@@ -1,6 +1,7 @@
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pydantic import Field
 from pathlib import Path
+from typing import Literal
 
 
 class Settings(BaseSettings):
@@ -11,6 +12,19 @@ class Settings(BaseSettings):
     )
 
     DATABASE_URL: str
+    # async-режим: asyncpg-движок и async-роуты для горячих эндпоинтов
+    DB_ASYNC: bool = False
+    ASYNC_DATABASE_URL: str | None = None
+
+    # пул соединений (на каждый процесс/воркер)
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    # таймауты сессии Postgres, мс (0 — не задавать: действуют настройки роли/базы)
+    DB_STATEMENT_TIMEOUT_MS: int = 0
+    DB_LOCK_TIMEOUT_MS: int = 0
     JWT_SECRET: str
     JWT_ALG: str = "HS256"
     JWT_TTL_MINUTES: int = 1440
@@ -18,11 +32,86 @@ class Settings(BaseSettings):
     ADMIN_USERNAME: str
     ADMIN_PASSWORD: str
 
+    # local | s3 (app/services/storage_backend.py)
+    STORAGE_BACKEND: str = "local"
     STORAGE_ROOT: str = str(Path("storage").resolve())
     BIRTH_CERTS_DIR: str = "birth_certs"
     MAX_UPLOAD_MB: int = 10
 
+    # отдача файлов: Cache-Control max-age и X-Accel-Redirect для nginx
+    FILES_CACHE_MAX_AGE: int = 86400
+    FILES_X_ACCEL_REDIRECT: bool = False
+    FILES_X_ACCEL_PREFIX: str = "/protected-storage/"
+
+    # S3-совместимое хранилище (STORAGE_BACKEND=s3), для MinIO: S3_ENDPOINT_URL=http://minio:9000, S3_ADDRESSING_STYLE=path
+    S3_ENDPOINT_URL: str | None = None
+    # адрес для presigned URL, если браузер видит хранилище не по S3_ENDPOINT_URL
+    S3_PUBLIC_ENDPOINT_URL: str | None = None
+    S3_BUCKET: str = "documents"
+    S3_PREFIX: str = ""
+    S3_REGION: str = "us-east-1"
+    S3_ACCESS_KEY: str | None = None
+    S3_SECRET_KEY: str | None = None
+    S3_ADDRESSING_STYLE: str = "auto"
+    # S3 не принимает части multipart меньше 5 МБ (кроме последней) — проверяем при старте
+    S3_MULTIPART_CHUNK_MB: int = Field(8, ge=5)
+    S3_PRESIGN_TTL_SECONDS: int = 300
+
+    # превью документов (webp | jpeg), генерируются в пуле процессов
+    PREVIEW_ENABLED: bool = True
+    PREVIEW_FORMAT: Literal["webp", "jpeg"] = "webp"  # ключи _FORMATS в preview_service
+    PREVIEW_WORKERS: int = 2
+    PREVIEW_TIMEOUT_SECONDS: float = 10.0
+
+    # сборка мусора в хранилище (python -m app.cli storage-gc): не трогать файлы и строки моложе,
+    # чтобы не задеть загрузки, которые ещё не закоммичены
+    STORAGE_GC_GRACE_HOURS: float = 24.0
+    STORAGE_GC_QUARANTINE_DIR: str = "gc_quarantine"
+
     CORS_ORIGINS: str = "*"
 
+    # /metrics: если задан токен, нужен заголовок Authorization: Bearer <token>
+    METRICS_TOKEN: str | None = None
+    # запросы, сделавшие больше SQL-запросов, логируются (0 — не проверять)
+    DB_QUERY_BUDGET: int = 30
+
+    # кэш total для /admin/applications?count=cached
+    LIST_COUNT_CACHE_TTL_SECONDS: int = 30
+    # кэш /public/registrations/check (в т.ч. "не зарегистрирован")
+    REGISTRATION_CACHE_TTL_SECONDS: int = 60
+    REGISTRATION_CACHE_SIZE: int = 50000
+    # кэш сериализованных карточек заявок (/admin/applications/{id})
+    DETAIL_CACHE_SIZE: int = 2000
+    DETAIL_CACHE_TTL_SECONDS: int = 300
+    # /admin/search: порог word_similarity (pg_trgm), 0..1 — чем меньше, тем «нечётче»
+    SEARCH_SIMILARITY_THRESHOLD: float = 0.5
+    # gzip/br для больших JSON-ответов (список заявок)
+    RESPONSE_COMPRESSION: bool = True
+
+    # фоновые задачи (таблица jobs, воркер: python -m app.worker)
+    JOBS_WORKER_CONCURRENCY: int = 4
+    JOBS_POLL_INTERVAL_SECONDS: float = 1.0
+    JOBS_MAX_ATTEMPTS: int = 5
+    # задержка повтора: base * 2^(attempt-1), не больше max
+    JOBS_BACKOFF_BASE_SECONDS: float = 10.0
+    JOBS_BACKOFF_MAX_SECONDS: float = 3600.0
+    # running-задача без завершения дольше этого считается брошенной (упавший воркер) и возвращается в очередь
+    JOBS_LEASE_SECONDS: int = 300
+    # класс уведомлений (dotted path), по умолчанию — заглушка, пишущая в лог
+    NOTIFIER_BACKEND: str = "app.services.notifier.LogNotifier"
+
+    # секции audit_log (python -m app.cli audit-partitions): сколько месяцев создавать вперёд,
+    # сколько хранить (0 — не удалять)
+    AUDIT_PARTITIONS_AHEAD: int = 3
+    AUDIT_RETENTION_MONTHS: int = 0
+
+
+    @property
+    def async_database_url(self) -> str:
+        if self.ASYNC_DATABASE_URL:
+            return self.ASYNC_DATABASE_URL
+        scheme, _, rest = self.DATABASE_URL.partition("://")
+        return f"postgresql+asyncpg://{rest}"
+
 
 settings = Settings()
@@ -1,12 +1,66 @@
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker, DeclarativeBase
 from app.core.config import settings
+from app.core.pool_stats import InstrumentedQueuePool, InstrumentedAsyncQueuePool, instrument_engine
+from app.core.metrics import instrument_queries
 
 
-engine = create_engine(settings.DATABASE_URL, pool_pre_ping=True)
+def _engine_kwargs() -> dict:
+    return dict(
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+    )
+
+
+def _session_options() -> dict[str, str]:
+    # выставляются на каждое соединение при подключении; 0 — не передаём вовсе, действуют настройки
+    # роли/базы (и pgbouncer в transaction mode не получает startup-параметр options)
+    options = {
+        "statement_timeout": settings.DB_STATEMENT_TIMEOUT_MS,
+        "lock_timeout": settings.DB_LOCK_TIMEOUT_MS,
+    }
+    return {k: str(v) for k, v in options.items() if v > 0}
+
+
+def _connect_args() -> dict:
+    options = _session_options()
+    if not options:
+        return {}
+    return {"options": " ".join(f"-c {k}={v}" for k, v in options.items())}
+
+
+engine = create_engine(
+    settings.DATABASE_URL,
+    poolclass=InstrumentedQueuePool,
+    connect_args=_connect_args(),
+    **_engine_kwargs(),
+)
+pool_stats = instrument_engine(engine)
+instrument_queries(engine)
 
 SessionLocal = sessionmaker(bind=engine, autocommit=False, autoflush=False)
 
+# async-движок создаётся только при DB_ASYNC=true, чтобы sync-режим не требовал asyncpg
+async_engine = None
+async_pool_stats = None
+AsyncSessionLocal = None
+
+if settings.DB_ASYNC:
+    from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+    async_engine = create_async_engine(
+        settings.async_database_url,
+        poolclass=InstrumentedAsyncQueuePool,
+        connect_args={"server_settings": _session_options()} if _session_options() else {},
+        **_engine_kwargs(),
+    )
+    async_pool_stats = instrument_engine(async_engine.sync_engine)
+    instrument_queries(async_engine.sync_engine)
+    AsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+
 
 class Base(DeclarativeBase):
     pass
@@ -17,4 +71,16 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+def pool_status() -> dict:
+    data = {"sync": pool_stats.snapshot(engine.pool)}
+    if async_engine is not None:
+        data["async"] = async_pool_stats.snapshot(async_engine.sync_engine.pool)
+    return data
@@ -7,3 +7,7 @@ def bad_request(msg: str) -> HTTPException:
 
 def not_found(msg: str) -> HTTPException:
     return HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=msg)
+
+
+def unauthorized(msg: str) -> HTTPException:
+    return HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail=msg)
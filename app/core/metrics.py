@@ -0,0 +1,125 @@
+import contextvars
+import logging
+import os
+import time
+from dataclasses import dataclass
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Histogram, REGISTRY, generate_latest
+from sqlalchemy import event
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ["method", "route", "status"],
+)
+REQUEST_DB_QUERIES = Histogram(
+    "http_request_db_queries",
+    "SQL statements executed per request",
+    ["route"],
+    buckets=(1, 2, 3, 5, 8, 13, 21, 34, 55, 89, 144, 233),
+)
+REQUEST_DB_SECONDS = Histogram(
+    "http_request_db_seconds",
+    "Total time spent in SQL per request",
+    ["route"],
+)
+QUERY_BUDGET_EXCEEDED = Counter(
+    "http_request_db_query_budget_exceeded_total",
+    "Requests that executed more SQL statements than DB_QUERY_BUDGET",
+    ["route"],
+)
+UPLOAD_BYTES = Histogram(
+    "upload_bytes",
+    "Size of stored uploads",
+    buckets=(64 * 1024, 256 * 1024, 1024 ** 2, 2 * 1024 ** 2, 5 * 1024 ** 2, 10 * 1024 ** 2, 20 * 1024 ** 2),
+)
+UPLOAD_SECONDS = Histogram(
+    "upload_duration_seconds",
+    "Time to stream an upload to storage",
+)
+
+
+@dataclass
+class QueryStats:
+    count: int = 0
+    seconds: float = 0.0
+
+
+# статистика SQL текущего запроса; объект общий для middleware и threadpool, где работает роут
+_query_stats: contextvars.ContextVar[QueryStats | None] = contextvars.ContextVar("query_stats", default=None)
+
+
+def current_query_stats() -> QueryStats | None:
+    return _query_stats.get()
+
+
+def instrument_queries(engine):
+    """Считает запросы и время в SQL для текущего HTTP-запроса (sync Engine или AsyncEngine.sync_engine)."""
+
+    # время старта храним на контексте выполнения: при ошибке after_cursor_execute не вызывается,
+    # и стек в conn.info рос бы, а тайминги следующих запросов съезжали бы
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context._query_started = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        started = getattr(context, "_query_started", None)
+        stats = _query_stats.get()
+        if stats is not None and started is not None:
+            stats.count += 1
+            stats.seconds += time.perf_counter() - started
+
+
+class MetricsMiddleware:
+    """Чистый ASGI-middleware: не буферизует стриминговые ответы (экспорт, файлы)."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats()
+        token = _query_stats.set(stats)
+        status_code = 500
+        started = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _query_stats.reset(token)
+            route = scope.get("route")
+            template = getattr(route, "path", None) or "unmatched"
+            REQUEST_LATENCY.labels(scope["method"], template, str(status_code)).observe(time.perf_counter() - started)
+            REQUEST_DB_QUERIES.labels(template).observe(stats.count)
+            REQUEST_DB_SECONDS.labels(template).observe(stats.seconds)
+            if settings.DB_QUERY_BUDGET and stats.count > settings.DB_QUERY_BUDGET:
+                QUERY_BUDGET_EXCEEDED.labels(template).inc()
+                logger.warning(
+                    "%s %s executed %d SQL statements (budget %d), %.1f ms in DB",
+                    scope["method"], template, stats.count, settings.DB_QUERY_BUDGET, stats.seconds * 1000,
+                )
+
+
+def render_metrics() -> tuple[bytes, str]:
+    registry = REGISTRY
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        # несколько воркеров uvicorn: собираем метрики всех процессов
+        from prometheus_client import multiprocess
+
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    return generate_latest(registry), CONTENT_TYPE_LATEST
@@ -0,0 +1,35 @@
+import gzip
+import orjson
+from fastapi import Request
+from fastapi.responses import Response
+
+from app.core.config import settings
+
+try:
+    import brotli
+except ImportError:  # brotli необязателен
+    brotli = None
+
+# меньше этого сжимать невыгодно
+COMPRESS_MIN_BYTES = 1024
+
+
+def fast_json_response(content, request: Request) -> Response:
+    """
+    JSON через orjson без response_model-валидации + gzip/br по Accept-Encoding.
+    Вывод совпадает с JSONResponse FastAPI (компактный, UTF-8, datetime/UUID как у pydantic).
+    """
+    body = orjson.dumps(content)
+    headers = {}
+
+    if settings.RESPONSE_COMPRESSION and len(body) >= COMPRESS_MIN_BYTES:
+        accept = request.headers.get("accept-encoding", "")
+        headers["Vary"] = "Accept-Encoding"
+        if brotli is not None and "br" in accept:
+            body = brotli.compress(body, quality=4)
+            headers["Content-Encoding"] = "br"
+        elif "gzip" in accept:
+            body = gzip.compress(body, compresslevel=5)
+            headers["Content-Encoding"] = "gzip"
+
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -1,15 +1,25 @@
-from fastapi import FastAPI
+from fastapi import APIRouter, FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.core.config import settings
-from app.core.db import Base, engine
+from app.core.exceptions import unauthorized
+from app.core.metrics import MetricsMiddleware, render_metrics
 from app.api.public import router as public_router
 from app.api.admin import router as admin_router
+from app.services.preview_service import shutdown_pool
 
 # import models to register metadata
 import app.models  # noqa: F401
 
 
+def _without_overridden(router: APIRouter, override: APIRouter) -> APIRouter:
+    # маршруты router, для которых в override есть async-версия с тем же path+method, выкидываем
+    taken = {(r.path, m) for r in override.routes for m in r.methods}
+    filtered = APIRouter()
+    filtered.routes = [r for r in router.routes if not any((r.path, m) in taken for m in r.methods)]
+    return filtered
+
+
 def create_app() -> FastAPI:
     app = FastAPI(
         title="N Kids Land API",
@@ -25,13 +35,29 @@ def create_app() -> FastAPI:
         allow_methods=["*"],
         allow_headers=["*"],
     )
-
-    app.include_router(public_router)
-    app.include_router(admin_router)
+    app.add_middleware(MetricsMiddleware)
+
+    @app.get("/metrics", include_in_schema=False)
+    def metrics(request: Request):
+        if settings.METRICS_TOKEN and request.headers.get("authorization") != f"Bearer {settings.METRICS_TOKEN}":
+            raise unauthorized("Invalid metrics token")
+        body, content_type = render_metrics()
+        return Response(content=body, media_type=content_type)
+
+    if settings.DB_ASYNC:
+        from app.api.aio.public import router as async_public_router
+        from app.api.aio.admin import router as async_admin_router
+
+        # sync-остаток первым: /admin/applications/export должен матчиться раньше /admin/applications/{app_id}
+        app.include_router(_without_overridden(public_router, async_public_router))
+        app.include_router(async_public_router)
+        app.include_router(_without_overridden(admin_router, async_admin_router))
+        app.include_router(async_admin_router)
+    else:
+        app.include_router(public_router)
+        app.include_router(admin_router)
+    app.add_event_handler("shutdown", shutdown_pool)
     return app
 
 
 app = create_app()
-
-# для локалки
-Base.metadata.create_all(bind=engine)
@@ -0,0 +1,82 @@
+"""baseline: схема, которую раньше создавал Base.metadata.create_all
+
+Revision ID: 0001_baseline
+Revises:
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = "0001_baseline"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "applications",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("full_name", sa.String(255), nullable=False),
+        sa.Column("whatsapp_phone", sa.String(64), nullable=False),
+        sa.Column("email", sa.String(225), nullable=False),
+        sa.Column("is_investor", sa.Boolean(), nullable=False),
+        sa.Column("objects", postgresql.JSONB(), nullable=False),
+        sa.Column("contract_number", sa.String(128), nullable=True),
+        sa.Column("children_total", sa.Integer(), nullable=False),
+        sa.Column("children_coming", sa.Integer(), nullable=False),
+        sa.Column("consent", sa.Boolean(), nullable=False),
+        sa.Column("status", sa.Enum("NEW", "APPROVED", "REJECTED", name="applicationstatus"), nullable=False),
+        sa.Column("reject_reason", sa.String(500), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+    )
+    op.create_index("ix_applications_email", "applications", ["email"])
+
+    op.create_table(
+        "files",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("storage_path", sa.String(512), nullable=False),
+        sa.Column("original_name", sa.String(255), nullable=False),
+        sa.Column("mime", sa.String(128), nullable=False),
+        sa.Column("size", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+    )
+
+    op.create_table(
+        "children",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column(
+            "application_id",
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("applications.id", ondelete="CASCADE"),
+            nullable=False,
+        ),
+        sa.Column("full_name", sa.String(255), nullable=False),
+        sa.Column("age", sa.Integer(), nullable=False),
+        sa.Column("birth_cert_file_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("files.id"), nullable=True),
+        sa.Column("birth_cert_file2_id", postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+    )
+
+    op.create_table(
+        "audit_log",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("actor", sa.String(128), nullable=False),
+        sa.Column("entity_type", sa.String(64), nullable=False),
+        sa.Column("entity_id", sa.String(64), nullable=False),
+        sa.Column("action", sa.String(64), nullable=False),
+        sa.Column("payload", sa.JSON(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+    )
+
+
+def downgrade():
+    op.drop_table("audit_log")
+    op.drop_table("children")
+    op.drop_table("files")
+    op.drop_index("ix_applications_email", table_name="applications")
+    op.drop_table("applications")
+    sa.Enum(name="applicationstatus").drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,38 @@
+"""content-addressed blobs, files.digest, applications.email_normalized
+
+Revision ID: 0002_blobs_email_normalized
+Revises: 0001_baseline
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0002_blobs_email_normalized"
+down_revision = "0001_baseline"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "blobs",
+        sa.Column("digest", sa.String(64), primary_key=True),
+        sa.Column("storage_path", sa.String(512), nullable=False),
+        sa.Column("size", sa.Integer(), nullable=False),
+        sa.Column("ref_count", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+    )
+    op.add_column("files", sa.Column("digest", sa.String(64), nullable=True))
+
+    # STORED generated column переписывает таблицу — катить в окно низкой нагрузки
+    op.add_column(
+        "applications",
+        sa.Column("email_normalized", sa.String(225), sa.Computed("lower(btrim(email))", persisted=True)),
+    )
+    # индексы на новые колонки строятся CONCURRENTLY в 0003
+
+
+def downgrade():
+    op.drop_column("applications", "email_normalized")
+    op.drop_column("files", "digest")
+    op.drop_table("blobs")
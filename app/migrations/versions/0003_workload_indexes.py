@@ -0,0 +1,48 @@
+"""индексы под рабочие запросы (CREATE INDEX CONCURRENTLY, без блокировки записи)
+
+Revision ID: 0003_workload_indexes
+Revises: 0002_blobs_email_normalized
+Create Date: 2026-10-18
+"""
+from alembic import op
+
+revision = "0003_workload_indexes"
+down_revision = "0002_blobs_email_normalized"
+branch_labels = None
+depends_on = None
+
+# CONCURRENTLY не работает внутри транзакции, поэтому каждый индекс — в autocommit_block.
+# Если сборка упала, Postgres оставляет INVALID-индекс: его надо удалить руками
+# (DROP INDEX CONCURRENTLY ...) и перезапустить миграцию.
+INDEXES = [
+    # фильтр по статусу + сортировка списка в админке
+    ("ix_applications_status_updated_created",
+     "applications (status, updated_at DESC, created_at DESC)"),
+    # objects.contains([...]) -> objects @> '[...]'
+    ("ix_applications_objects_gin",
+     "applications USING gin (objects jsonb_path_ops)"),
+    # whatsapp_phone ILIKE '%...%'
+    ("ix_applications_whatsapp_phone_trgm",
+     "applications USING gin (whatsapp_phone gin_trgm_ops)"),
+    # /public/registrations/check
+    ("ix_applications_email_normalized_status",
+     "applications (email_normalized, status)"),
+    # joinedload(Application.children) и каскадное удаление
+    ("ix_children_application_id",
+     "children (application_id)"),
+    ("ix_files_digest",
+     "files (digest)"),
+]
+
+
+def upgrade():
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    with op.get_context().autocommit_block():
+        for name, definition in INDEXES:
+            op.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {definition}")
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, _ in reversed(INDEXES):
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
@@ -0,0 +1,51 @@
+"""applications.status_rank + индексы сортировки по нему
+
+Revision ID: 0004_status_rank
+Revises: 0003_workload_indexes
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0004_status_rank"
+down_revision = "0003_workload_indexes"
+branch_labels = None
+depends_on = None
+
+# снимок STATUS_RANK_SQL на момент миграции
+STATUS_RANK_SQL = "CASE status WHEN 'APPROVED' THEN 1 WHEN 'NEW' THEN 2 WHEN 'REJECTED' THEN 3 ELSE 4 END"
+
+
+def upgrade():
+    # STORED generated column переписывает таблицу — катить в окно низкой нагрузки
+    op.add_column(
+        "applications",
+        sa.Column("status_rank", sa.Integer(), sa.Computed(STATUS_RANK_SQL, persisted=True)),
+    )
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_applications_rank_updated_created_id "
+            "ON applications (status_rank, updated_at DESC, created_at DESC, id DESC)"
+        )
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_applications_email_normalized_rank "
+            "ON applications (email_normalized, status_rank) INCLUDE (status)"
+        )
+        # их заменили индексы выше (фильтр по status дублируется условием по status_rank)
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_applications_email_normalized_status")
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_applications_status_updated_created")
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_applications_status_updated_created "
+            "ON applications (status, updated_at DESC, created_at DESC)"
+        )
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_applications_email_normalized_status "
+            "ON applications (email_normalized, status)"
+        )
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_applications_email_normalized_rank")
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_applications_rank_updated_created_id")
+    op.drop_column("applications", "status_rank")
@@ -0,0 +1,26 @@
+"""stats_counters для /admin/stats
+
+Revision ID: 0005_stats_counters
+Revises: 0004_status_rank
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0005_stats_counters"
+down_revision = "0004_status_rank"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "stats_counters",
+        sa.Column("key", sa.String(300), primary_key=True),
+        sa.Column("value", sa.BigInteger(), nullable=False),
+    )
+    # после миграции заполнить: python -m app.cli stats-rebuild
+
+
+def downgrade():
+    op.drop_table("stats_counters")
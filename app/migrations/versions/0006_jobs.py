@@ -0,0 +1,38 @@
+"""jobs: очередь фоновых задач
+
+Revision ID: 0006_jobs
+Revises: 0005_stats_counters
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = "0006_jobs"
+down_revision = "0005_stats_counters"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "jobs",
+        sa.Column("id", sa.BigInteger(), primary_key=True, autoincrement=True),
+        sa.Column("kind", sa.String(64), nullable=False),
+        sa.Column("payload", postgresql.JSONB(), nullable=False),
+        sa.Column("status", sa.String(16), nullable=False),
+        sa.Column("attempts", sa.Integer(), nullable=False),
+        sa.Column("max_attempts", sa.Integer(), nullable=False),
+        sa.Column("run_after", sa.DateTime(), nullable=False),
+        sa.Column("locked_at", sa.DateTime(), nullable=True),
+        sa.Column("locked_by", sa.String(128), nullable=True),
+        sa.Column("last_error", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("finished_at", sa.DateTime(), nullable=True),
+    )
+    op.create_index("ix_jobs_queued_run_after", "jobs", ["run_after"], postgresql_where=sa.text("status = 'queued'"))
+    op.create_index("ix_jobs_running_locked_at", "jobs", ["locked_at"], postgresql_where=sa.text("status = 'running'"))
+
+
+def downgrade():
+    op.drop_table("jobs")
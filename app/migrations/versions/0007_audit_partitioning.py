@@ -0,0 +1,91 @@
+"""audit_log: месячные секции по created_at, индексы для /admin/audit
+
+Revision ID: 0007_audit_partitioning
+Revises: 0006_jobs
+Create Date: 2026-10-18
+"""
+from datetime import date, datetime
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0007_audit_partitioning"
+down_revision = "0006_jobs"
+branch_labels = None
+depends_on = None
+
+MONTHS_AHEAD = 3
+
+
+def _add_months(d: date, months: int) -> date:
+    y, m = divmod(d.month - 1 + months, 12)
+    return date(d.year + y, m + 1, 1)
+
+
+def upgrade():
+    # секционировать существующую таблицу нельзя — создаём новую и переливаем данные.
+    # audit_log пишется только при модерации, копия укладывается в одну транзакцию.
+    op.rename_table("audit_log", "audit_log_legacy")
+    op.execute("ALTER SEQUENCE IF EXISTS audit_log_id_seq RENAME TO audit_log_legacy_id_seq")
+    op.execute("ALTER INDEX IF EXISTS audit_log_pkey RENAME TO audit_log_legacy_pkey")
+    op.execute("""
+        CREATE TABLE audit_log (
+            id bigint GENERATED BY DEFAULT AS IDENTITY,
+            actor varchar(128) NOT NULL,
+            entity_type varchar(64) NOT NULL,
+            entity_id varchar(64) NOT NULL,
+            action varchar(64) NOT NULL,
+            payload json NOT NULL,
+            created_at timestamp NOT NULL,
+            PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at)
+    """)
+    op.execute("CREATE TABLE audit_log_default PARTITION OF audit_log DEFAULT")
+
+    bind = op.get_bind()
+    first = bind.execute(sa.text("SELECT min(created_at) FROM audit_log_legacy")).scalar()
+    current = datetime.utcnow().date().replace(day=1)
+    month = first.date().replace(day=1) if first else current
+    last = _add_months(current, MONTHS_AHEAD)
+    while month <= last:
+        nxt = _add_months(month, 1)
+        op.execute(
+            f"CREATE TABLE audit_log_y{month.year:04d}m{month.month:02d} PARTITION OF audit_log "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{nxt.isoformat()}')"
+        )
+        month = nxt
+
+    # индексы на родителе создаются во всех секциях
+    op.create_index("ix_audit_log_created_id", "audit_log", ["created_at", "id"])
+    op.create_index("ix_audit_log_entity", "audit_log", ["entity_type", "entity_id", "created_at"])
+    op.create_index("ix_audit_log_actor", "audit_log", ["actor", "created_at"])
+
+    op.execute("""
+        INSERT INTO audit_log (id, actor, entity_type, entity_id, action, payload, created_at)
+        SELECT id, actor, entity_type, entity_id, action, payload, created_at FROM audit_log_legacy
+    """)
+    op.execute("""
+        SELECT setval(pg_get_serial_sequence('audit_log', 'id'), coalesce(max(id), 0) + 1, false) FROM audit_log
+    """)
+    op.drop_table("audit_log_legacy")
+
+
+def downgrade():
+    op.execute("ALTER TABLE audit_log RENAME TO audit_log_partitioned")
+    op.create_table(
+        "audit_log",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("actor", sa.String(128), nullable=False),
+        sa.Column("entity_type", sa.String(64), nullable=False),
+        sa.Column("entity_id", sa.String(64), nullable=False),
+        sa.Column("action", sa.String(64), nullable=False),
+        sa.Column("payload", sa.JSON(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+    )
+    op.execute("""
+        INSERT INTO audit_log (id, actor, entity_type, entity_id, action, payload, created_at)
+        SELECT id, actor, entity_type, entity_id, action, payload, created_at FROM audit_log_partitioned
+    """)
+    # identity-последовательность секционированной таблицы осталась audit_log_id_seq,
+    # у новой SERIAL-колонки имя другое — берём по таблице
+    op.execute("SELECT setval(pg_get_serial_sequence('audit_log', 'id'), coalesce((SELECT max(id) FROM audit_log), 0) + 1, false)")
+    op.execute("DROP TABLE audit_log_partitioned")
@@ -0,0 +1,42 @@
+"""children: статус модерации
+
+Revision ID: 0008_child_moderation
+Revises: 0007_audit_partitioning
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0008_child_moderation"
+down_revision = "0007_audit_partitioning"
+branch_labels = None
+depends_on = None
+
+child_status = sa.Enum("PENDING", "APPROVED", "REJECTED", name="childstatus")
+
+
+def upgrade():
+    child_status.create(op.get_bind(), checkfirst=True)
+    # константный DEFAULT не переписывает таблицу
+    op.add_column("children", sa.Column("status", child_status, nullable=False, server_default="PENDING"))
+    op.add_column("children", sa.Column("reject_reason", sa.String(500), nullable=True))
+    op.add_column("children", sa.Column("checked_by", sa.String(128), nullable=True))
+    op.add_column("children", sa.Column("checked_at", sa.DateTime(), nullable=True))
+    # у уже решённых заявок дети получают решение родителя, иначе первое же решение по ребёнку
+    # вернуло бы такую заявку в NEW (есть PENDING). Переписывает строки — катить в окно низкой нагрузки.
+    op.execute("""
+        UPDATE children c
+        SET status = CAST(CAST(a.status AS text) AS childstatus),
+            reject_reason = CASE WHEN a.status = 'REJECTED' THEN a.reject_reason END,
+            checked_at = a.updated_at
+        FROM applications a
+        WHERE a.id = c.application_id AND a.status IN ('APPROVED', 'REJECTED')
+    """)
+
+
+def downgrade():
+    op.drop_column("children", "checked_at")
+    op.drop_column("children", "checked_by")
+    op.drop_column("children", "reject_reason")
+    op.drop_column("children", "status")
+    child_status.drop(op.get_bind(), checkfirst=True)
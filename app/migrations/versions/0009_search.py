@@ -0,0 +1,48 @@
+"""applications.phone_digits + триграммные индексы для /admin/search
+
+Revision ID: 0009_search
+Revises: 0008_child_moderation
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0009_search"
+down_revision = "0008_child_moderation"
+branch_labels = None
+depends_on = None
+
+# снимок PHONE_DIGITS_SQL на момент миграции
+PHONE_DIGITS_SQL = "regexp_replace(whatsapp_phone, '[^0-9]', '', 'g')"
+
+INDEXES = [
+    # GiST, а не GIN: нужен KNN (ORDER BY q <<-> col LIMIT n по индексу)
+    ("ix_applications_full_name_trgm",
+     "applications USING gist (full_name gist_trgm_ops)"),
+    ("ix_applications_email_normalized_trgm",
+     "applications USING gist (email_normalized gist_trgm_ops)"),
+    ("ix_children_full_name_trgm",
+     "children USING gist (full_name gist_trgm_ops)"),
+    # телефон ищется подстрокой: phone_digits LIKE '%...%'
+    ("ix_applications_phone_digits_trgm",
+     "applications USING gin (phone_digits gin_trgm_ops)"),
+]
+
+
+def upgrade():
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    # STORED generated column переписывает таблицу — катить в окно низкой нагрузки
+    op.add_column(
+        "applications",
+        sa.Column("phone_digits", sa.String(64), sa.Computed(PHONE_DIGITS_SQL, persisted=True)),
+    )
+    with op.get_context().autocommit_block():
+        for name, definition in INDEXES:
+            op.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {definition}")
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, _ in reversed(INDEXES):
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+    op.drop_column("applications", "phone_digits")
@@ -0,0 +1,32 @@
+"""индексы для сборки мусора в хранилище
+
+Revision ID: 0010_storage_gc_indexes
+Revises: 0009_search
+Create Date: 2026-10-18
+"""
+from alembic import op
+
+revision = "0010_storage_gc_indexes"
+down_revision = "0009_search"
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    # NOT EXISTS (... children WHERE birth_cert_file*_id = files.id)
+    ("ix_children_birth_cert_file_id", "children (birth_cert_file_id)"),
+    ("ix_children_birth_cert_file2_id", "children (birth_cert_file2_id)"),
+    # сверка файлов на диске: storage_path = ANY(:paths)
+    ("ix_files_storage_path", "files (storage_path)"),
+]
+
+
+def upgrade():
+    with op.get_context().autocommit_block():
+        for name, definition in INDEXES:
+            op.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {definition}")
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, _ in reversed(INDEXES):
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
@@ -1,4 +1,7 @@
 from app.models.application import Application, ApplicationStatus
-from app.models.child import Child
+from app.models.child import Child, ChildStatus
 from app.models.file import File
-from app.models.audit import AuditLog
\ No newline at end of file
+from app.models.blob import Blob
+from app.models.audit import AuditLog
+from app.models.stats import StatsCounter
+from app.models.job import Job, JobStatus
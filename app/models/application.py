@@ -1,7 +1,7 @@
 import enum
 import uuid
 from datetime import datetime
-from sqlalchemy import String, Boolean, Integer, DateTime, Enum
+from sqlalchemy import String, Boolean, Integer, DateTime, Enum, Computed, Index
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from app.core.db import Base
@@ -14,14 +14,44 @@ class ApplicationStatus(str, enum.Enum):
     REJECTED = "REJECTED"
 
 
+# порядок статусов в админке и в /registrations/check: APPROVED -> NEW -> REJECTED
+STATUS_RANK = {
+    ApplicationStatus.APPROVED: 1,
+    ApplicationStatus.NEW: 2,
+    ApplicationStatus.REJECTED: 3,
+}
+
+STATUS_RANK_SQL = (
+    "CASE status"
+    + "".join(f" WHEN '{s.value}' THEN {r}" for s, r in STATUS_RANK.items())
+    + " ELSE 4 END"
+)
+
+PHONE_DIGITS_SQL = "regexp_replace(whatsapp_phone, '[^0-9]', '', 'g')"
+
+
 class Application(Base):
     __tablename__ = "applications"
+    __table_args__ = (
+        # /public/registrations/check: index-only scan, первая строка — лучший статус
+        Index("ix_applications_email_normalized_rank", "email_normalized", "status_rank", postgresql_include=["status"]),
+        # objects.contains([...]) и whatsapp_phone ILIKE '%...%'
+        Index("ix_applications_objects_gin", "objects", postgresql_using="gin", postgresql_ops={"objects": "jsonb_path_ops"}),
+        Index("ix_applications_whatsapp_phone_trgm", "whatsapp_phone", postgresql_using="gin", postgresql_ops={"whatsapp_phone": "gin_trgm_ops"}),
+        # /admin/search: GiST, чтобы ORDER BY q <<-> col LIMIT n шёл по индексу (KNN)
+        Index("ix_applications_full_name_trgm", "full_name", postgresql_using="gist", postgresql_ops={"full_name": "gist_trgm_ops"}),
+        Index("ix_applications_email_normalized_trgm", "email_normalized", postgresql_using="gist", postgresql_ops={"email_normalized": "gist_trgm_ops"}),
+        Index("ix_applications_phone_digits_trgm", "phone_digits", postgresql_using="gin", postgresql_ops={"phone_digits": "gin_trgm_ops"}),
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
 
     full_name: Mapped[str] = mapped_column(String(255), nullable=False)
     whatsapp_phone: Mapped[str] = mapped_column(String(64), nullable=False)
+    # только цифры: "+7 (999) 123-45-67" и "89991234567" ищутся одинаково
+    phone_digits: Mapped[str] = mapped_column(String(64), Computed(PHONE_DIGITS_SQL, persisted=True))
     email: Mapped[str] = mapped_column(String(225), nullable=False, index=True)
+    email_normalized: Mapped[str] = mapped_column(String(225), Computed("lower(btrim(email))", persisted=True))
 
     is_investor: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False)
     objects: Mapped[list[str]] = mapped_column(JSONB, nullable=False, default=list)
@@ -33,9 +63,20 @@ class Application(Base):
     consent: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False)
 
     status: Mapped[ApplicationStatus] = mapped_column(Enum(ApplicationStatus), nullable=False, default=ApplicationStatus.NEW)
+    status_rank: Mapped[int] = mapped_column(Integer, Computed(STATUS_RANK_SQL, persisted=True))
     reject_reason: Mapped[str | None] = mapped_column(String(500), nullable=True)
 
     created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=datetime.utcnow)
     updated_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     children = relationship("Child", back_populates="application", cascade="all, delete-orphan")
+
+
+# сортировка списка в админке и keyset-курсор (см. миграцию 0004)
+Index(
+    "ix_applications_rank_updated_created_id",
+    Application.status_rank,
+    Application.updated_at.desc(),
+    Application.created_at.desc(),
+    Application.id.desc(),
+)
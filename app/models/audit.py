@@ -1,4 +1,4 @@
-from sqlalchemy import String, DateTime, JSON, Integer
+from sqlalchemy import String, DateTime, JSON, BigInteger, Identity, Index
 from sqlalchemy.orm import Mapped, mapped_column
 from datetime import datetime
 
@@ -6,12 +6,24 @@ from app.core.db import Base
 
 
 class AuditLog(Base):
+    """
+    Журнал действий. Таблица секционирована по месяцам (RANGE по created_at), поэтому created_at
+    входит в первичный ключ; секции создаёт/удаляет app/services/audit_service.py.
+    """
+
     __tablename__ = "audit_log"
+    __table_args__ = (
+        # /admin/audit: лента по времени (keyset created_at DESC, id DESC)
+        Index("ix_audit_log_created_id", "created_at", "id"),
+        Index("ix_audit_log_entity", "entity_type", "entity_id", "created_at"),
+        Index("ix_audit_log_actor", "actor", "created_at"),
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
 
-    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    id: Mapped[int] = mapped_column(BigInteger, Identity(), primary_key=True)
     actor: Mapped[str] = mapped_column(String(128), nullable=False)
     entity_type: Mapped[str] = mapped_column(String(64), nullable=False)
     entity_id: Mapped[str] = mapped_column(String(64), nullable=False)
     action: Mapped[str] = mapped_column(String(64), nullable=False)
     payload: Mapped[dict] = mapped_column(JSON, nullable=False, default=dict)
-    created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=datetime.utcnow)
+    created_at: Mapped[datetime] = mapped_column(DateTime, primary_key=True, default=datetime.utcnow)
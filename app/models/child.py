@@ -1,22 +1,42 @@
+import enum
 import uuid
 from datetime import datetime
-from sqlalchemy import String, Integer, DateTime, ForeignKey
+from sqlalchemy import String, Integer, DateTime, ForeignKey, Enum, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from app.core.db import Base
 
 
+class ChildStatus(str, enum.Enum):
+    PENDING = "PENDING"
+    APPROVED = "APPROVED"
+    REJECTED = "REJECTED"
+
+
 class Child(Base):
     __tablename__ = "children"
+    __table_args__ = (
+        # /admin/search по имени ребёнка (KNN по GiST)
+        Index("ix_children_full_name_trgm", "full_name", postgresql_using="gist", postgresql_ops={"full_name": "gist_trgm_ops"}),
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    application_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("applications.id", ondelete="CASCADE"), nullable=False)
+    application_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("applications.id", ondelete="CASCADE"), nullable=False, index=True)
 
     full_name: Mapped[str] = mapped_column(String(255), nullable=False)
     age: Mapped[int] = mapped_column(Integer, nullable=False)
 
-    birth_cert_file_id: Mapped[uuid.UUID | None] = mapped_column(UUID(as_uuid=True), ForeignKey("files.id"), nullable=True)
-    birth_cert_file2_id: Mapped[uuid.UUID | None] = mapped_column(UUID(as_uuid=True), nullable=True)
+    # индексы: проверка "на файл никто не ссылается" (сборка мусора) и FK при удалении File
+    birth_cert_file_id: Mapped[uuid.UUID | None] = mapped_column(UUID(as_uuid=True), ForeignKey("files.id"), nullable=True, index=True)
+    birth_cert_file2_id: Mapped[uuid.UUID | None] = mapped_column(UUID(as_uuid=True), nullable=True, index=True)
+
+    # модерация (app/services/moderation_service.py)
+    status: Mapped[ChildStatus] = mapped_column(
+        Enum(ChildStatus, name="childstatus"), nullable=False, default=ChildStatus.PENDING, server_default=ChildStatus.PENDING.value
+    )
+    reject_reason: Mapped[str | None] = mapped_column(String(500), nullable=True)
+    checked_by: Mapped[str | None] = mapped_column(String(128), nullable=True)
+    checked_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
 
     created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=datetime.utcnow)
     updated_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -12,9 +12,12 @@ class File(Base):
 
     id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
 
-    storage_path: Mapped[str] = mapped_column(String(512), nullable=False)
+    # index: сборка мусора сверяет файлы на диске с таблицей пачками по storage_path
+    storage_path: Mapped[str] = mapped_column(String(512), nullable=False, index=True)
     original_name: Mapped[str] = mapped_column(String(255), nullable=False)
     mime: Mapped[str] = mapped_column(String(128), nullable=False)
     size: Mapped[int] = mapped_column(Integer, nullable=False)
+    # sha256 содержимого -> blobs.digest; у старых файлов (до дедупликации) пусто
+    digest: Mapped[str | None] = mapped_column(String(64), nullable=True, index=True)
 
     created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=datetime.utcnow)
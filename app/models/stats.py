@@ -0,0 +1,13 @@
+from sqlalchemy import String, BigInteger
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.db import Base
+
+
+class StatsCounter(Base):
+    """Счётчики дашборда, ключи см. app/services/stats_service.py."""
+
+    __tablename__ = "stats_counters"
+
+    key: Mapped[str] = mapped_column(String(300), primary_key=True)
+    value: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
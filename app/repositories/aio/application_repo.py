@@ -0,0 +1,111 @@
+"""Async-версия app.repositories.application_repo (DB_ASYNC=true). Запросы и кэши общие."""
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from app.core.cache import MISSING
+from app.models import Application
+from app.repositories.application_repo import (
+    Explain,
+    LIST_COLUMNS,
+    application_version_statement,
+    RELTUPLES_SQL,
+    count_cache,
+    count_statement,
+    filter_applications,
+    next_cursor_for,
+    normalize_email,
+    page_statement,
+    plan_rows,
+    registration_cache,
+    registration_status_statement,
+)
+
+
+async def create_application(db: AsyncSession, app: Application) -> Application:
+    db.add(app)
+    await db.flush()
+    return app
+
+
+async def get_application_detail(db: AsyncSession, app_id):
+    # selectinload вместо joinedload: в async ленивые загрузки недоступны, а так дети приходят вторым запросом
+    return (
+        await db.execute(
+            select(Application)
+            .options(selectinload(Application.children))
+            .where(Application.id == app_id)
+        )
+    ).scalar_one_or_none()
+
+
+async def get_application_version(db: AsyncSession, app_id):
+    return (await db.execute(application_version_statement(app_id))).first()
+
+
+async def _estimate_count(db: AsyncSession, base) -> int:
+    if base.whereclause is None:
+        est = (await db.execute(RELTUPLES_SQL)).scalar()
+        if est is not None and est >= 0:
+            return int(est)
+    return plan_rows((await db.execute(Explain(base))).scalar())
+
+
+async def _count(db: AsyncSession, base, count_mode: str, cache_key) -> Optional[int]:
+    if count_mode == "none":
+        return None
+    if count_mode == "estimate":
+        return await _estimate_count(db, base)
+    if count_mode == "cached":
+        total = count_cache.get(cache_key)
+        if total is MISSING:
+            total = (await db.execute(count_statement(base))).scalar_one()
+            count_cache.set(cache_key, total)
+        return total
+    return (await db.execute(count_statement(base))).scalar_one()
+
+
+async def list_applications(
+    db: AsyncSession,
+    page: int,
+    per_page: int,
+    status: Optional[str],
+    is_investor: Optional[bool],
+    object_value: Optional[str],
+    phone_search: Optional[str],
+    created_from: Optional[datetime],
+    created_to: Optional[datetime],
+    email: Optional[str],
+    cursor: Optional[str] = None,
+    count_mode: str = "exact",
+):
+    filters = dict(
+        status=status,
+        is_investor=is_investor,
+        object_value=object_value,
+        phone_search=phone_search,
+        created_from=created_from,
+        created_to=created_to,
+        email=email,
+    )
+    base = filter_applications(select(*LIST_COLUMNS), **filters)
+
+    total = await _count(db, base, count_mode, tuple(sorted(filters.items())))
+    items = (await db.execute(page_statement(base, page, per_page, cursor))).all()
+
+    return total, items, next_cursor_for(items, per_page)
+
+
+async def get_registration_status_by_email(db: AsyncSession, email: str):
+    key = normalize_email(email)
+    cached = registration_cache.get(key)
+    if cached is not MISSING:
+        return cached
+
+    status = (await db.execute(registration_status_statement(key))).scalar()
+    result = status.value if status else None
+
+    registration_cache.set(key, result)
+    return result
@@ -0,0 +1,7 @@
+"""Async-версия app.repositories.child_repo (DB_ASYNC=true)."""
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models import Child
+
+
+async def get_child(db: AsyncSession, child_id):
+    return await db.get(Child, child_id)
@@ -0,0 +1,28 @@
+"""Async-версия app.repositories.file_repo (DB_ASYNC=true)."""
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import MISSING
+from app.models import File
+from app.repositories.file_repo import FileMeta, acquire_blob_statement, file_meta_cache, file_meta_statement
+
+
+async def create_file(db: AsyncSession, f: File) -> File:
+    if f.digest:
+        await db.execute(acquire_blob_statement(f.digest, f.storage_path, f.size))
+    db.add(f)
+    await db.flush()
+    return f
+
+
+async def get_file(db: AsyncSession, file_id):
+    return await db.get(File, file_id)
+
+
+async def get_file_meta(db: AsyncSession, file_id) -> FileMeta | None:
+    meta = file_meta_cache.get(file_id)
+    if meta is MISSING:
+        row = (await db.execute(file_meta_statement(file_id))).first()
+        meta = FileMeta(*row) if row else None
+        if meta is not None:
+            file_meta_cache.set(file_id, meta)
+    return meta
@@ -1,9 +1,53 @@
+import base64
+import json
+import uuid
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import exists, func, case, desc
-from app.models import Application, ApplicationStatus
+from sqlalchemy import exists, func, desc, tuple_, text, select, union_all
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import ClauseElement, Executable
+from app.core.cache import TTLCache, MISSING
+from app.core.config import settings
+from app.models import Application, Child
+from app.models.application import STATUS_RANK
 from datetime import datetime
 from typing import Optional
 
+COUNT_MODES = {"exact", "cached", "estimate", "none"}
+
+# колонки списка в админке (+ всё, что нужно для курсора); полные сущности не грузим
+LIST_COLUMNS = (
+    Application.id,
+    Application.full_name,
+    Application.whatsapp_phone,
+    Application.is_investor,
+    Application.objects,
+    Application.contract_number,
+    Application.children_total,
+    Application.children_coming,
+    Application.email,
+    Application.status,
+    Application.created_at,
+    Application.updated_at,
+    Application.status_rank,
+)
+
+count_cache = TTLCache(maxsize=256, ttl=settings.LIST_COUNT_CACHE_TTL_SECONDS)
+
+# кэш процесса: при нескольких воркерах чужие изменения видны не позже чем через TTL
+registration_cache = TTLCache(maxsize=settings.REGISTRATION_CACHE_SIZE, ttl=settings.REGISTRATION_CACHE_TTL_SECONDS)
+
+
+class Explain(Executable, ClauseElement):
+    inherit_cache = False
+
+    def __init__(self, stmt):
+        self.statement = stmt
+
+
+@compiles(Explain, "postgresql")
+def _compile_explain(element, compiler, **kw):
+    return "EXPLAIN (FORMAT JSON) " + compiler.process(element.statement, **kw)
+
 
 def create_application(db: Session, app: Application) -> Application:
     db.add(app)
@@ -20,22 +64,62 @@ def get_application_detail(db: Session, app_id):
     )
 
 
-def list_applications(
-    db: Session,
-    page: int,
-    per_page: int,
-    status: Optional[str],
-    is_investor: Optional[bool],
-    object_value: Optional[str],
-    phone_search: Optional[str],
-    created_from: Optional[datetime],
-    created_to: Optional[datetime],
-    email: Optional[str],
-):
-    q = db.query(Application)
+def get_application_for_update(db: Session, app_id):
+    """Заявка под FOR UPDATE: старый статус для дельт счётчиков не должен устареть до commit."""
+    return (
+        db.query(Application)
+        .filter(Application.id == app_id)
+        .with_for_update()
+        .populate_existing()
+        .first()
+    )
+
+
+def application_version_statement(app_id):
+    # одна строка: версия заявки и её детей для ETag карточки
+    return (
+        select(Application.updated_at, func.max(Child.updated_at), func.count(Child.id))
+        .select_from(Application)
+        .outerjoin(Child, Child.application_id == Application.id)
+        .where(Application.id == app_id)
+        .group_by(Application.id)
+    )
+
+
+def get_application_version(db: Session, app_id):
+    return db.execute(application_version_statement(app_id)).first()
+
+
+def encode_cursor(priority: int, updated_at: datetime, created_at: datetime, app_id) -> str:
+    raw = json.dumps([priority, updated_at.isoformat(), created_at.isoformat(), str(app_id)])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
 
+
+def decode_cursor(cursor: str) -> tuple[int, datetime, datetime, uuid.UUID]:
+    """Разбирает курсор из encode_cursor. Кидает ValueError на мусор."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        priority, updated_at, created_at, app_id = json.loads(raw)
+        return int(priority), datetime.fromisoformat(updated_at), datetime.fromisoformat(created_at), uuid.UUID(app_id)
+    except Exception as e:
+        raise ValueError("Invalid cursor") from e
+
+
+def filter_applications(
+    q,
+    status: Optional[str] = None,
+    is_investor: Optional[bool] = None,
+    object_value: Optional[str] = None,
+    phone_search: Optional[str] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    email: Optional[str] = None,
+):
     if status:
         q = q.filter(Application.status == status)
+        if status in STATUS_RANK:
+            # дублируем условие по status_rank, чтобы работал индекс сортировки
+            q = q.filter(Application.status_rank == STATUS_RANK[status])
 
     if is_investor is not None:
         q = q.filter(Application.is_investor == is_investor)
@@ -46,50 +130,170 @@ def list_applications(
     if phone_search:
         q = q.filter(Application.whatsapp_phone.ilike(f"%{phone_search}%"))
 
+    if email:
+        q = q.filter(Application.email == email)
+
     if created_from:
         q = q.filter(Application.created_at >= created_from)
     if created_to:
         q = q.filter(Application.created_at <= created_to)
 
-    priority = case(
-        (Application.status == ApplicationStatus.APPROVED, 1),
-        (Application.status == ApplicationStatus.NEW, 2),
-        (Application.status == ApplicationStatus.REJECTED, 3),
-        else_=4,
-    )
+    return q
+
+
+def _sort_keys(cols):
+    # id в конце — чтобы порядок был строгим и по нему можно было строить курсор
+    return (cols.status_rank.asc(), desc(cols.updated_at), desc(cols.created_at), desc(cols.id))
+
+
+def order_applications(q):
+    return q.order_by(*_sort_keys(Application))
+
 
-    total = q.count()
-    items = (
-        q.order_by(
-            priority.asc(),
-    desc(Application.updated_at).nullslast(),
-            desc(Application.created_at).nullslast(),
-        )
-        .offset((page - 1) * per_page)
-        .limit(per_page)
-        .all()
+def after_cursor_statement(base, cursor: str, per_page: int):
+    """
+    Страница строго после строки из курсора в порядке order_applications.
+
+    status_rank идёт ASC, остальные ключи DESC, поэтому одно условие
+    "rank > c OR (rank = c AND row < cursor)" индекс не ограничивает — Postgres читал бы
+    его с начала и отбрасывал строки Filter'ом. Делим на два диапазона индекса
+    (rank = c AND (updated_at, created_at, id) < (...)) и (rank > c), каждый с LIMIT,
+    и склеиваем через UNION ALL: сортируются не больше 2 * per_page строк.
+    """
+    c_rank, c_updated, c_created, c_id = decode_cursor(cursor)
+    same_rank = base.filter(
+        Application.status_rank == c_rank,
+        tuple_(Application.updated_at, Application.created_at, Application.id) < tuple_(c_updated, c_created, c_id),
     )
-    return total, items
+    next_ranks = base.filter(Application.status_rank > c_rank)
+    page = union_all(
+        order_applications(same_rank).limit(per_page),
+        order_applications(next_ranks).limit(per_page),
+    ).subquery("page")
+    return select(page).order_by(*_sort_keys(page.c)).limit(per_page)
 
 
-def get_registration_status_by_email(db: Session, email: str):
-    # приоритет статусов
-    priority = case(
-        (Application.status == ApplicationStatus.APPROVED, 1),
-        (Application.status == ApplicationStatus.NEW, 2),
-        (Application.status == ApplicationStatus.REJECTED, 3),
-        else_=4,
+def page_statement(base, page: int, per_page: int, cursor: Optional[str]):
+    if cursor:
+        return after_cursor_statement(base, cursor, per_page)
+    if cursor is not None:
+        return order_applications(base).limit(per_page)
+    return order_applications(base).offset((page - 1) * per_page).limit(per_page)
+
+
+def next_cursor_for(items: list, per_page: int) -> Optional[str]:
+    if len(items) < per_page:
+        return None
+    last = items[-1]
+    return encode_cursor(last.status_rank, last.updated_at, last.created_at, last.id)
+
+
+def count_statement(base):
+    return select(func.count()).select_from(base.order_by(None).subquery())
+
+
+RELTUPLES_SQL = text("SELECT reltuples::bigint FROM pg_class WHERE oid = 'applications'::regclass")
+
+
+def plan_rows(plan) -> int:
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def _estimate_count(db: Session, base) -> int:
+    # оценка планировщика: без фильтров — reltuples, иначе "Plan Rows" из EXPLAIN
+    if base.whereclause is None:
+        est = db.execute(RELTUPLES_SQL).scalar()
+        if est is not None and est >= 0:
+            return int(est)
+    return plan_rows(db.execute(Explain(base)).scalar())
+
+
+def _count(db: Session, base, count_mode: str, cache_key) -> Optional[int]:
+    if count_mode == "none":
+        return None
+    if count_mode == "estimate":
+        return _estimate_count(db, base)
+    if count_mode == "cached":
+        total = count_cache.get(cache_key)
+        if total is MISSING:
+            total = db.execute(count_statement(base)).scalar_one()
+            count_cache.set(cache_key, total)
+        return total
+    return db.execute(count_statement(base)).scalar_one()
+
+
+def list_applications(
+    db: Session,
+    page: int,
+    per_page: int,
+    status: Optional[str],
+    is_investor: Optional[bool],
+    object_value: Optional[str],
+    phone_search: Optional[str],
+    created_from: Optional[datetime],
+    created_to: Optional[datetime],
+    email: Optional[str],
+    cursor: Optional[str] = None,
+    count_mode: str = "exact",
+):
+    """
+    Список заявок для админки.
+
+    cursor=None — классическая пагинация через OFFSET по page.
+    cursor="" или значение next_cursor — keyset-пагинация: page игнорируется,
+    следующая страница берётся строго после последней строки предыдущей.
+
+    Возвращает (total, rows, next_cursor); rows — кортежи LIST_COLUMNS.
+    total=None при count_mode="none".
+    """
+    filters = dict(
+        status=status,
+        is_investor=is_investor,
+        object_value=object_value,
+        phone_search=phone_search,
+        created_from=created_from,
+        created_to=created_to,
+        email=email,
     )
+    base = filter_applications(select(*LIST_COLUMNS), **filters)
 
-    row = (
-        db.query(Application.status)
-        .filter(Application.email == email)
-        .order_by(priority)
-        .first()
+    total = _count(db, base, count_mode, tuple(sorted(filters.items())))
+    items = db.execute(page_statement(base, page, per_page, cursor)).all()
+
+    return total, items, next_cursor_for(items, per_page)
+
+
+def normalize_email(email: str) -> str:
+    # должно совпадать с Computed("lower(btrim(email))") в модели: btrim режет только пробелы
+    return email.strip(" ").lower()
+
+
+def invalidate_registration_status(*emails: str):
+    for email in emails:
+        if email:
+            registration_cache.delete(normalize_email(email))
+
+
+def registration_status_statement(email_normalized: str):
+    # index-only scan по (email_normalized, status_rank) INCLUDE (status), первая строка — лучший статус
+    return (
+        select(Application.status)
+        .where(Application.email_normalized == email_normalized)
+        .order_by(Application.status_rank)
+        .limit(1)
     )
 
-    if not row:
-        return None
 
-    return row.status.value
+def get_registration_status_by_email(db: Session, email: str):
+    key = normalize_email(email)
+    cached = registration_cache.get(key)
+    if cached is not MISSING:
+        return cached
+
+    status = db.execute(registration_status_statement(key)).scalar()
+    result = status.value if status else None
 
+    registration_cache.set(key, result)
+    return result
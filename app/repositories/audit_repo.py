@@ -0,0 +1,69 @@
+import base64
+import json
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import insert, select, tuple_
+from sqlalchemy.orm import Session
+from app.models import AuditLog
+
+
+def bulk_add_audit(db: Session, rows: list[dict]):
+    """Пишет пачку AuditLog одним INSERT (executemany / insertmanyvalues)."""
+    if rows:
+        db.execute(insert(AuditLog), rows)
+
+
+def encode_audit_cursor(created_at: datetime, audit_id: int) -> str:
+    raw = json.dumps([created_at.isoformat(), audit_id])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_audit_cursor(cursor: str) -> tuple[datetime, int]:
+    """Разбирает курсор из encode_audit_cursor. Кидает ValueError на мусор."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, audit_id = json.loads(raw)
+        return datetime.fromisoformat(created_at), int(audit_id)
+    except Exception as e:
+        raise ValueError("Invalid cursor") from e
+
+
+def list_audit(
+    db: Session,
+    limit: int,
+    cursor: Optional[str] = None,
+    actor: Optional[str] = None,
+    entity_type: Optional[str] = None,
+    entity_id: Optional[str] = None,
+    action: Optional[str] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+):
+    """
+    Лента журнала, новые сверху, keyset по (created_at, id).
+    Условия по created_at отсекают лишние секции. Возвращает (rows, next_cursor).
+    """
+    q = select(AuditLog)
+    if actor:
+        q = q.where(AuditLog.actor == actor)
+    if entity_type:
+        q = q.where(AuditLog.entity_type == entity_type)
+    if entity_id:
+        q = q.where(AuditLog.entity_id == entity_id)
+    if action:
+        q = q.where(AuditLog.action == action)
+    if created_from:
+        q = q.where(AuditLog.created_at >= created_from)
+    if created_to:
+        q = q.where(AuditLog.created_at <= created_to)
+    if cursor:
+        c_created, c_id = decode_audit_cursor(cursor)
+        q = q.where(tuple_(AuditLog.created_at, AuditLog.id) < tuple_(c_created, c_id))
+
+    q = q.order_by(AuditLog.created_at.desc(), AuditLog.id.desc()).limit(limit)
+    rows = db.execute(q).scalars().all()
+
+    next_cursor = None
+    if len(rows) == limit:
+        next_cursor = encode_audit_cursor(rows[-1].created_at, rows[-1].id)
+    return rows, next_cursor
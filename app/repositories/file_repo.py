@@ -1,8 +1,28 @@
+from collections import Counter
+from typing import NamedTuple
+from sqlalchemy import delete, update, select
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.orm import Session
-from app.models import File
+from app.core.cache import TTLCache, MISSING
+from app.models import File, Blob
+
+
+class FileMeta(NamedTuple):
+    id: object
+    storage_path: str
+    original_name: str
+    mime: str
+    size: int
+    digest: str | None
+
+
+# содержимое File не меняется после загрузки, поэтому метаданные можно держать в памяти
+file_meta_cache = TTLCache(maxsize=4096, ttl=300)
 
 
 def create_file(db: Session, f: File) -> File:
+    if f.digest:
+        acquire_blob(db, f.digest, f.storage_path, f.size)
     db.add(f)
     db.flush()
     return f
@@ -10,3 +30,93 @@ def create_file(db: Session, f: File) -> File:
 
 def get_file(db: Session, file_id):
     return db.query(File).filter(File.id == file_id).first()
+
+
+def file_meta_statement(file_id):
+    return select(File.id, File.storage_path, File.original_name, File.mime, File.size, File.digest).where(File.id == file_id)
+
+
+def get_file_meta(db: Session, file_id) -> FileMeta | None:
+    meta = file_meta_cache.get(file_id)
+    if meta is MISSING:
+        row = db.execute(file_meta_statement(file_id)).first()
+        meta = FileMeta(*row) if row else None
+        if meta is not None:
+            file_meta_cache.set(file_id, meta)
+    return meta
+
+
+def forget_file_meta(file_id):
+    file_meta_cache.delete(file_id)
+
+
+def acquire_blob_statement(digest: str, storage_path: str, size: int):
+    return (
+        insert(Blob)
+        .values(digest=digest, storage_path=storage_path, size=size, ref_count=1)
+        .on_conflict_do_update(index_elements=[Blob.digest], set_={"ref_count": Blob.ref_count + 1})
+        .returning(Blob.ref_count)
+    )
+
+
+def acquire_blob(db: Session, digest: str, storage_path: str, size: int) -> int:
+    """+1 ссылка на blob (создаёт строку, если её ещё нет). Атомарно через ON CONFLICT."""
+    return db.execute(acquire_blob_statement(digest, storage_path, size)).scalar_one()
+
+
+def release_blob(db: Session, digest: str, count: int = 1) -> str | None:
+    """
+    -count ссылок на blob. Если ссылок не осталось — удаляет строку и возвращает storage_path,
+    файл с диска убирает вызывающий код после commit (storage_service.remove_blob_if_unreferenced).
+    """
+    left = db.execute(
+        update(Blob)
+        .where(Blob.digest == digest)
+        .values(ref_count=Blob.ref_count - count)
+        .returning(Blob.ref_count, Blob.storage_path)
+    ).first()
+    if left is None or left.ref_count > 0:
+        return None
+    db.execute(delete(Blob).where(Blob.digest == digest, Blob.ref_count <= 0))
+    return left.storage_path
+
+
+def delete_file(db: Session, f: File) -> str | None:
+    """Удаляет строку File и отпускает её blob. Возвращает путь blob'а, который стал никому не нужен."""
+    orphan = release_blob(db, f.digest) if f.digest else None
+    forget_file_meta(f.id)
+    db.delete(f)
+    db.flush()
+    return orphan
+
+
+def delete_files(db: Session, file_ids: list) -> list[tuple[str | None, str]]:
+    """
+    Удаляет строки File одним DELETE ... RETURNING и отпускает их blob'ы (по одному UPDATE на digest).
+    Возвращает [(digest, path), ...] файлов, которые больше никому не нужны — убрать с диска после commit.
+    Для старых файлов без digest путь возвращается всегда.
+    """
+    if not file_ids:
+        return []
+    rows = db.execute(
+        delete(File).where(File.id.in_(file_ids)).returning(File.id, File.storage_path, File.digest)
+        .execution_options(synchronize_session=False)
+    ).all()
+
+    orphans = []
+    by_digest = Counter()
+    for r in rows:
+        forget_file_meta(r.id)
+        if r.digest:
+            by_digest[r.digest] += 1
+        else:
+            orphans.append((None, r.storage_path))
+    for digest, count in by_digest.items():
+        path = release_blob(db, digest, count)
+        if path:
+            orphans.append((digest, path))
+    return orphans
+
+
+def blob_exists(db: Session, digest: str) -> bool:
+    return db.query(Blob.digest).filter(Blob.digest == digest).first() is not None
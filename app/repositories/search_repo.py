@@ -0,0 +1,88 @@
+import re
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+
+# телефон ищем подстрокой, короче — слишком много совпадений и триграммы не работают
+MIN_PHONE_DIGITS = 3
+
+# Каждая ветка берёт top-k по своему полю через KNN по GiST-индексу (q <<-> col),
+# поэтому стоимость не зависит от числа строк, совпавших с порогом.
+_NAME_BRANCH = """
+    (SELECT a.id AS application_id, 'full_name' AS field, a.full_name AS value,
+            word_similarity(:q, a.full_name) AS score
+     FROM applications a
+     WHERE :q <% a.full_name
+     ORDER BY :q <<-> a.full_name
+     LIMIT :k)
+"""
+_CHILD_BRANCH = """
+    (SELECT c.application_id, 'child_full_name', c.full_name,
+            word_similarity(:q, c.full_name)
+     FROM children c
+     WHERE :q <% c.full_name
+     ORDER BY :q <<-> c.full_name
+     LIMIT :k)
+"""
+_EMAIL_BRANCH = """
+    (SELECT a.id, 'email', a.email,
+            word_similarity(:q_lower, a.email_normalized)
+     FROM applications a
+     WHERE :q_lower <% a.email_normalized
+     ORDER BY :q_lower <<-> a.email_normalized
+     LIMIT :k)
+"""
+# точное совпадение номера — 1.0, иначе доля совпавших цифр
+_PHONE_BRANCH = """
+    (SELECT a.id, 'whatsapp_phone', a.whatsapp_phone,
+            CAST(length(:digits) AS float) / greatest(length(a.phone_digits), 1)
+     FROM applications a
+     WHERE a.phone_digits LIKE :digits_like
+     LIMIT :k)
+"""
+
+_SEARCH_SQL = """
+WITH hits AS (
+    {branches}
+),
+best AS (
+    SELECT DISTINCT ON (application_id) application_id, field, value, score
+    FROM hits
+    ORDER BY application_id, score DESC
+)
+SELECT a.id, a.full_name, a.email, a.whatsapp_phone, a.status, a.created_at,
+       b.field AS matched_field, b.value AS matched_value, b.score
+FROM best b JOIN applications a ON a.id = b.application_id
+ORDER BY b.score DESC, a.created_at DESC
+LIMIT :limit
+"""
+
+
+def search_applications(db: Session, q: str, limit: int):
+    """
+    Нечёткий поиск заявок по ФИО родителя, ФИО ребёнка, email и телефону (только цифры).
+    Одна строка на заявку — лучшее совпадение; сортировка по score (0..1).
+    """
+    q = q.strip()
+    digits = re.sub(r"\D", "", q)
+
+    branches = [_NAME_BRANCH, _CHILD_BRANCH, _EMAIL_BRANCH]
+    if len(digits) >= MIN_PHONE_DIGITS:
+        branches.append(_PHONE_BRANCH)
+    sql = _SEARCH_SQL.format(branches="UNION ALL".join(branches))
+
+    # порог для <% — только в текущей транзакции
+    db.execute(
+        text("SELECT set_config('pg_trgm.word_similarity_threshold', :t, true)"),
+        {"t": str(settings.SEARCH_SIMILARITY_THRESHOLD)},
+    )
+    # запас на ветку: несколько совпадений могут схлопнуться в одну заявку
+    return db.execute(text(sql), {
+        "q": q,
+        "q_lower": q.lower(),
+        "digits": digits,
+        "digits_like": f"%{digits}%",
+        "k": limit * 3,
+        "limit": limit,
+    }).all()
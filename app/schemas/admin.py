@@ -1,4 +1,15 @@
+from typing import List, Literal, Optional
+from uuid import UUID
 from pydantic import BaseModel, Field
 
 class RejectApplicationRequest(BaseModel):
-    reason: str = Field(min_length=2, max_length=500)
\ No newline at end of file
+    reason: str = Field(min_length=2, max_length=500)
+
+class ChildDecision(BaseModel):
+    child_id: UUID
+    decision: Literal["approve", "reject"]
+    reason: Optional[str] = Field(default=None, min_length=2, max_length=500)
+
+
+class ChildModerationRequest(BaseModel):
+    decisions: List[ChildDecision] = Field(min_length=1, max_length=10000)
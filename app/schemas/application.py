@@ -45,10 +45,11 @@ class ApplicationListItem(BaseModel):
 
 
 class ApplicationListResponse(BaseModel):
-    total: int
+    total: Optional[int]
     page: int
     per_page: int
     items: List[ApplicationListItem]
+    next_cursor: Optional[str] = None
 
 
 class ChildView(BaseModel):
@@ -57,6 +58,10 @@ class ChildView(BaseModel):
     age: int
     path_image: str
     path_image2: Optional[str] = None
+    preview_image: Optional[str] = None
+    preview_image2: Optional[str] = None
+    status: str = "PENDING"
+    reject_reason: Optional[str] = None
 
 
 class ApplicationDetail(BaseModel):
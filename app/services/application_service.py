@@ -1,58 +1,165 @@
 import uuid
-from app.models.application import Application
-from app.schemas.application import ApplicationDetail, ApplicationListItem
+from collections import Counter
+from datetime import datetime
+from sqlalchemy import update, select, any_, bindparam
+from sqlalchemy.dialects.postgresql import ARRAY, UUID
 from sqlalchemy.orm import Session
+from app.models.application import Application, ApplicationStatus
+from app.models.child import Child, ChildStatus
+from app.schemas.application import ApplicationCreate
+from app.repositories.application_repo import invalidate_registration_status
+from app.repositories.audit_repo import bulk_add_audit
+from app.repositories.file_repo import delete_files
+from app.services.stats_service import apply_deltas, application_deltas, status_change_deltas
+from app.services.detail_service import invalidate_application_detail
+from app.services.storage_service import remove_orphans
 
+# сколько id отправляем в один UPDATE ... WHERE id = ANY(:ids)
+BULK_CHUNK_SIZE = 1000
 
-def reject_list_applications(db: Session, uid_list: list[uuid.UUID]):
-    apps = db.query(Application).filter(Application.id.in_(uid_list)).all()
-    errors = []
-    for app in apps:
-        try:
-            app.status = "REJECTED"
-            app.reject_reason = "Отклонено админом"
-            db.add(app)
-        except Exception as e:
-            errors.append((str(app.id), str(e)))
-    db.commit()
-    return errors
+ADMIN_REJECT_REASON = "Отклонено админом"
 
+# решение по заявке целиком переносится на её ещё не проверенных детей; свои решения
+# по детям (moderation_service) не перезаписываются. Возврат заявки в NEW детей не трогает:
+# следующее решение по ребёнку пересчитает статус заявки по детям
+CHILD_STATUS_FOR = {
+    ApplicationStatus.APPROVED: ChildStatus.APPROVED,
+    ApplicationStatus.REJECTED: ChildStatus.REJECTED,
+}
 
-def accept_list_applications(db: Session, uid_list: list[uuid.UUID]):
-    apps = db.query(Application).filter(Application.id.in_(uid_list)).all()
-    errors = []
-    for app in apps:
-        try:
-            app.status = "APPROVED"
-            app.reject_reason = None
-            db.add(app)
-        except Exception as e:
-            errors.append((str(app.id), str(e)))
-    db.commit()
-    return errors
 
+def application_rule_error(dto: ApplicationCreate) -> str | None:
+    """Бизнес-проверки заявки поверх схемы (публичная форма и импорт)."""
+    if dto.children_coming > dto.children_total:
+        return "children_coming must be <= children_total"
+    if not dto.consent:
+        return "consent must be true"
+    if dto.is_investor and len(dto.objects) == 0:
+        return "objects must be non-empty for investor"
+    return None
 
-def make_new_list_applications(db: Session, uid_list: list[uuid.UUID]):
-    apps = db.query(Application).filter(Application.id.in_(uid_list)).all()
-    errors = []
-    for app in apps:
-        try:
-            app.status = "NEW"
-            app.reject_reason = None
-            db.add(app)
-        except Exception as e:
-            errors.append((str(app.id), str(e)))
+
+def _chunks(items: list, size: int = BULK_CHUNK_SIZE):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def set_children_status(db: Session, app_ids: list[uuid.UUID], status: ApplicationStatus, reject_reason: str | None, actor: str):
+    """Одним UPDATE ставит PENDING-детям заявок статус, соответствующий статусу заявки (CHILD_STATUS_FOR)."""
+    child_status = CHILD_STATUS_FOR.get(status)
+    if not app_ids or child_status is None:
+        return
+    now = datetime.utcnow()
+    db.execute(
+        update(Child)
+        .where(
+            Child.application_id == any_(bindparam("ids", type_=ARRAY(UUID(as_uuid=True)))),
+            Child.status == ChildStatus.PENDING,
+        )
+        .values(
+            status=child_status,
+            reject_reason=reject_reason if child_status == ChildStatus.REJECTED else None,
+            checked_by=actor,
+            checked_at=now,
+            updated_at=now,
+        )
+        .execution_options(synchronize_session=False),
+        {"ids": list(app_ids)},
+    )
+
+
+def _bulk_set_status(
+    db: Session,
+    uid_list: list[uuid.UUID],
+    status: ApplicationStatus,
+    reject_reason: str | None,
+    actor: str,
+    action: str,
+):
+    """
+    Меняет статус набору заявок set-based: один UPDATE ... RETURNING id на чанк
+    и один INSERT в audit_log на чанк. Возвращает ошибки для id, которых нет в базе.
+    """
+    ids = list(dict.fromkeys(uid_list))
+    found: set[uuid.UUID] = set()
+    emails: set[str] = set()
+    deltas = Counter()
+    payload = {"reason": reject_reason} if status == ApplicationStatus.REJECTED else {}
+
+    # старый статус нужен для счётчиков дашборда: берём его в CTE под FOR UPDATE
+    old = (
+        select(Application.id, Application.status)
+        .where(Application.id == any_(bindparam("ids", type_=ARRAY(UUID(as_uuid=True)))))
+        .with_for_update()
+        .cte("old")
+    )
+    stmt = (
+        update(Application)
+        .where(Application.id == old.c.id)
+        .values(status=status, reject_reason=reject_reason)
+        .returning(Application.id, Application.email_normalized, Application.children_coming, old.c.status.label("old_status"))
+        .execution_options(synchronize_session=False)
+    )
+
+    for chunk in _chunks(ids):
+        rows = db.execute(stmt, {"ids": chunk}).all()
+        updated = [r.id for r in rows]
+        found.update(updated)
+        set_children_status(db, updated, status, reject_reason, actor)
+        emails.update(r.email_normalized for r in rows)
+        for r in rows:
+            deltas.update(status_change_deltas(r.old_status, status, r.children_coming))
+        bulk_add_audit(db, [
+            dict(actor=actor, entity_type="application", entity_id=str(app_id), action=action, payload=payload)
+            for app_id in updated
+        ])
+
+    apply_deltas(db, deltas)
     db.commit()
-    return errors
+    invalidate_registration_status(*emails)
+    invalidate_application_detail(*found)
+    return [(str(app_id), "Application not found") for app_id in ids if app_id not in found]
+
+
+def reject_list_applications(db: Session, uid_list: list[uuid.UUID], actor: str):
+    return _bulk_set_status(db, uid_list, ApplicationStatus.REJECTED, ADMIN_REJECT_REASON, actor, "reject")
+
+
+def accept_list_applications(db: Session, uid_list: list[uuid.UUID], actor: str):
+    return _bulk_set_status(db, uid_list, ApplicationStatus.APPROVED, None, actor, "approve")
+
+
+def make_new_list_applications(db: Session, uid_list: list[uuid.UUID], actor: str):
+    return _bulk_set_status(db, uid_list, ApplicationStatus.NEW, None, actor, "to_new")
 
 
 def delete_list_applications(db: Session, uid_list: list[uuid.UUID]):
     apps = db.query(Application).filter(Application.id.in_(uid_list)).all()
     errors = []
+    emails = [app.email for app in apps]
+    app_ids = [app.id for app in apps]
+    # документы детей: строки File и blob'ы отпускаем вместе с заявками
+    file_ids = [
+        fid
+        for row in db.execute(
+            select(Child.birth_cert_file_id, Child.birth_cert_file2_id).where(Child.application_id.in_(app_ids))
+        )
+        for fid in row
+        if fid is not None
+    ]
+    deltas = Counter()
     for app in apps:
         try:
             db.delete(app)
+            deltas.update(application_deltas(app.status, app.is_investor, app.objects, app.children_coming, sign=-1))
         except Exception as e:
             errors.append((str(app.id), str(e)))
+    # дети должны уйти раньше файлов (FK children.birth_cert_file_id)
+    db.flush()
+    orphans = delete_files(db, file_ids)
+    apply_deltas(db, deltas)
     db.commit()
-    return errors
\ No newline at end of file
+    remove_orphans(db, orphans)
+    invalidate_registration_status(*emails)
+    invalidate_application_detail(*app_ids)
+    return errors
@@ -0,0 +1,85 @@
+"""
+Обслуживание секций audit_log: по секции на календарный месяц (UTC), имена audit_log_yYYYYmMM.
+
+Секции создаются заранее (python -m app.cli audit-partitions, по cron), строки вне созданных
+месяцев попадают в audit_log_default и переносятся при создании нужной секции.
+Удаление старых данных — DROP секции целиком, без DELETE и VACUUM.
+"""
+import re
+from datetime import date, datetime
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+DEFAULT_PARTITION = "audit_log_default"
+_PARTITION_RE = re.compile(r"^audit_log_y(\d{4})m(\d{2})$")
+
+
+def month_start(d: date) -> date:
+    return date(d.year, d.month, 1)
+
+
+def add_months(d: date, months: int) -> date:
+    y, m = divmod(d.month - 1 + months, 12)
+    return date(d.year + y, m + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"audit_log_y{month.year:04d}m{month.month:02d}"
+
+
+def existing_partitions(db: Session) -> dict[str, date]:
+    rows = db.execute(text("""
+        SELECT c.relname FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = 'audit_log'::regclass
+    """)).scalars()
+    result = {}
+    for name in rows:
+        m = _PARTITION_RE.match(name)
+        if m:
+            result[name] = date(int(m.group(1)), int(m.group(2)), 1)
+    return result
+
+
+def create_month_partition(db: Session, month: date):
+    """
+    Создаёт секцию месяца. Если в default-секции уже есть строки этого месяца, они переносятся:
+    ATTACH PARTITION проверяет, что default не содержит строк нового диапазона.
+    """
+    name = partition_name(month)
+    lo, hi = month.isoformat(), add_months(month, 1).isoformat()
+    db.execute(text(f"CREATE TABLE {name} (LIKE audit_log INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"))
+    moved = db.execute(text(f"""
+        WITH moved AS (
+            DELETE FROM {DEFAULT_PARTITION} WHERE created_at >= :lo AND created_at < :hi RETURNING *
+        )
+        INSERT INTO {name} SELECT * FROM moved
+    """), {"lo": lo, "hi": hi}).rowcount
+    db.execute(text(f"ALTER TABLE audit_log ATTACH PARTITION {name} FOR VALUES FROM ('{lo}') TO ('{hi}')"))
+    return moved
+
+
+def ensure_partitions(db: Session, months_ahead: int, today: date | None = None) -> list[str]:
+    """Секции на текущий месяц и months_ahead вперёд. Возвращает имена созданных."""
+    existing = existing_partitions(db)
+    current = month_start(today or datetime.utcnow().date())
+    created = []
+    for i in range(months_ahead + 1):
+        month = add_months(current, i)
+        if partition_name(month) not in existing:
+            create_month_partition(db, month)
+            created.append(partition_name(month))
+    db.commit()
+    return created
+
+
+def drop_partitions_before(db: Session, cutoff: date) -> list[str]:
+    """Удаляет секции месяцев, целиком лежащих раньше cutoff."""
+    dropped = []
+    for name, month in sorted(existing_partitions(db).items(), key=lambda kv: kv[1]):
+        if add_months(month, 1) <= cutoff:
+            db.execute(text(f"ALTER TABLE audit_log DETACH PARTITION {name}"))
+            db.execute(text(f"DROP TABLE {name}"))
+            dropped.append(name)
+    db.commit()
+    return dropped
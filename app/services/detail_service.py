@@ -0,0 +1,50 @@
+import hashlib
+from fastapi.responses import Response
+
+from app.core.cache import TTLCache, MISSING
+from app.core.config import settings
+
+# сериализованные ApplicationDetail: app_id -> (etag, body). Запись отдаётся только
+# при совпадении etag с текущей версией строки, так что устаревшая запись не утечёт
+# даже из соседнего воркера; инвалидация просто освобождает память раньше.
+detail_cache = TTLCache(maxsize=settings.DETAIL_CACHE_SIZE, ttl=settings.DETAIL_CACHE_TTL_SECONDS)
+
+# версия формата ответа: поднимать при любом изменении ApplicationDetail/ChildView,
+# иначе клиенты получат 304 на старое тело. 2 — статусы детей (модерация по детям).
+DETAIL_SCHEMA_VERSION = 2
+
+
+def detail_etag(app_id, version) -> str:
+    """version — строка (updated_at, max(children.updated_at), count(children)) из application_version_statement."""
+    updated_at, children_updated_at, children_count = version
+    raw = f"{DETAIL_SCHEMA_VERSION}|{app_id}|{updated_at.isoformat()}|{children_updated_at.isoformat() if children_updated_at else ''}|{children_count}"
+    return '"' + hashlib.sha1(raw.encode()).hexdigest() + '"'
+
+
+def cached_detail(app_id, etag: str) -> bytes | None:
+    item = detail_cache.get(app_id)
+    if item is MISSING or item[0] != etag:
+        return None
+    return item[1]
+
+
+def store_detail(app_id, etag: str, body: bytes):
+    detail_cache.set(app_id, (etag, body))
+
+
+def invalidate_application_detail(*app_ids):
+    for app_id in app_ids:
+        detail_cache.delete(app_id)
+
+
+def _headers(etag: str) -> dict:
+    # no-cache: браузер хранит копию, но каждый раз спрашивает If-None-Match
+    return {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers=_headers(etag))
+
+
+def detail_response(body: bytes, etag: str) -> Response:
+    return Response(content=body, media_type="application/json", headers=_headers(etag))
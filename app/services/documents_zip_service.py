@@ -0,0 +1,117 @@
+"""
+ZIP с документами детей для выбранных заявок, собирается на лету.
+
+Заявки читаются пачками (export_service.iter_application_batches), файлы — потоково из хранилища,
+архив пишется в неперематываемый поток: zipfile сам ставит data descriptor, размеры и CRC
+идут после данных. В памяти — только текущий кусок файла, на диск ничего не пишется.
+"""
+import io
+import re
+import zipfile
+from datetime import datetime
+from sqlalchemy import select
+
+from app.core.db import SessionLocal
+from app.models import File
+from app.services.export_service import iter_application_batches
+from app.services.storage_backend import get_storage
+from app.services.storage_service import resolve_rel_path
+
+# pdf/jpeg/png уже сжаты: deflate тратит CPU и почти ничего не выигрывает
+STORED_MIME = {"application/pdf", "image/jpeg", "image/png"}
+_EXT_BY_MIME = {"application/pdf": "pdf", "image/jpeg": "jpg", "image/png": "png"}
+_UNSAFE = re.compile(r'[\x00-\x1f\\/:*?"<>|]+')
+MAX_NAME = 100
+
+
+class _ZipSink(io.RawIOBase):
+    """Неперематываемый поток для ZipFile: накапливает записанное до следующего drain()."""
+
+    def __init__(self):
+        self._chunks: list[bytes] = []
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        self._chunks.append(bytes(b))
+        return len(b)
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def safe_name(value: str) -> str:
+    name = _UNSAFE.sub(" ", value or "").strip(" .")
+    return re.sub(r"\s+", " ", name)[:MAX_NAME] or "без имени"
+
+
+def _extension(f) -> str:
+    if f.original_name and "." in f.original_name:
+        return f.original_name.rsplit(".", 1)[-1].lower()
+    return _EXT_BY_MIME.get(f.mime, "bin")
+
+
+def _entries(db, batch):
+    """[(arcname, file_row), ...] для пачки заявок; имена — "<родитель> (<id>)/<NN> <ребёнок>[ (2)].<ext>"."""
+    file_ids = [
+        fid for _, children in batch for c in children
+        for fid in (c.birth_cert_file_id, c.birth_cert_file2_id) if fid
+    ]
+    files = {}
+    if file_ids:
+        rows = db.execute(
+            select(File.id, File.storage_path, File.original_name, File.mime).where(File.id.in_(file_ids))
+        )
+        files = {r.id: r for r in rows}
+
+    for app, children in batch:
+        folder = f"{safe_name(app.full_name)} ({str(app.id)[:8]})"
+        for idx, c in enumerate(children, 1):
+            base = f"{folder}/{idx:02d} {safe_name(c.full_name)}"
+            for n, fid in enumerate((c.birth_cert_file_id, c.birth_cert_file2_id), 1):
+                f = files.get(fid) if fid else None
+                if f is not None:
+                    suffix = "" if n == 1 else " (2)"
+                    yield f"{base}{suffix}.{_extension(f)}", f
+
+
+def stream_documents_zip(filters: dict, ids: list | None = None):
+    """
+    Генератор для StreamingResponse. Открывает свою сессию (как export_service.stream_export).
+    Файлы, которых нет в хранилище, перечисляются в MISSING.txt в конце архива.
+    """
+    storage = get_storage()
+    sink = _ZipSink()
+    missing = []
+    now = datetime.now().timetuple()[:6]
+
+    db = SessionLocal()
+    try:
+        with zipfile.ZipFile(sink, mode="w", allowZip64=True) as zf:
+            for batch in iter_application_batches(db, filters, ids=ids):
+                for arcname, f in _entries(db, batch):
+                    info = zipfile.ZipInfo(arcname, date_time=now)
+                    info.compress_type = zipfile.ZIP_STORED if f.mime in STORED_MIME else zipfile.ZIP_DEFLATED
+                    rel = resolve_rel_path(f.storage_path)
+                    try:
+                        chunks = storage.open_range(rel)
+                        first = next(chunks, b"")
+                    except Exception:
+                        # нет в хранилище (или не читается) — архив не обрываем
+                        missing.append(f"{arcname}: file {f.id}")
+                        continue
+                    # размер записи ограничен MAX_UPLOAD_MB, zip64 нужен только для смещений (allowZip64)
+                    with zf.open(info, mode="w") as dest:
+                        dest.write(first)
+                        for chunk in chunks:
+                            yield sink.drain()
+                            dest.write(chunk)
+                    yield sink.drain()
+            if missing:
+                zf.writestr(zipfile.ZipInfo("MISSING.txt", date_time=now), "\n".join(missing) + "\n")
+        yield sink.drain()
+    finally:
+        db.close()
@@ -0,0 +1,137 @@
+import csv
+import io
+import json
+from collections import defaultdict
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.db import SessionLocal
+from app.models import Application, Child
+from app.repositories.application_repo import filter_applications, order_applications
+
+EXPORT_FORMATS = {"csv", "ndjson"}
+EXPORT_BATCH_SIZE = 1000
+
+APPLICATION_COLUMNS = [
+    Application.id,
+    Application.full_name,
+    Application.whatsapp_phone,
+    Application.email,
+    Application.is_investor,
+    Application.objects,
+    Application.contract_number,
+    Application.children_total,
+    Application.children_coming,
+    Application.status,
+    Application.reject_reason,
+    Application.created_at,
+    Application.updated_at,
+]
+
+CHILD_COLUMNS = [
+    Child.application_id,
+    Child.id,
+    Child.full_name,
+    Child.age,
+    Child.birth_cert_file_id,
+    Child.birth_cert_file2_id,
+]
+
+CSV_HEADER = [c.key for c in APPLICATION_COLUMNS] + [
+    "child_id",
+    "child_full_name",
+    "child_age",
+    "child_birth_cert_file_id",
+    "child_birth_cert_file2_id",
+]
+
+
+def _app_dict(row) -> dict:
+    return {
+        "id": str(row.id),
+        "full_name": row.full_name,
+        "whatsapp_phone": row.whatsapp_phone,
+        "email": row.email,
+        "is_investor": row.is_investor,
+        "objects": row.objects,
+        "contract_number": row.contract_number,
+        "children_total": row.children_total,
+        "children_coming": row.children_coming,
+        "status": row.status.value,
+        "reject_reason": row.reject_reason,
+        "created_at": row.created_at.isoformat(),
+        "updated_at": row.updated_at.isoformat(),
+    }
+
+
+def _child_dict(row) -> dict:
+    return {
+        "id": str(row.id),
+        "full_name": row.full_name,
+        "age": row.age,
+        "birth_cert_file_id": str(row.birth_cert_file_id) if row.birth_cert_file_id else None,
+        "birth_cert_file2_id": str(row.birth_cert_file2_id) if row.birth_cert_file2_id else None,
+    }
+
+
+def iter_application_batches(db: Session, filters: dict, batch_size: int = EXPORT_BATCH_SIZE, ids: list | None = None):
+    """
+    Отдаёт заявки пачками [(app_row, [child_row, ...]), ...]; ids — только эти заявки (вместе с filters).
+
+    Заявки читаются server-side курсором (yield_per), дети — одним запросом на пачку,
+    так что в памяти одновременно живёт не больше batch_size заявок.
+    """
+    stmt = filter_applications(select(*APPLICATION_COLUMNS), **filters)
+    if ids is not None:
+        stmt = stmt.where(Application.id.in_(ids))
+    stmt = order_applications(stmt)
+    result = db.execute(stmt.execution_options(yield_per=batch_size))
+
+    for apps in result.partitions():
+        children = defaultdict(list)
+        batch_ids = [a.id for a in apps]
+        for c in db.execute(select(*CHILD_COLUMNS).where(Child.application_id.in_(batch_ids)).order_by(Child.created_at)):
+            children[c.application_id].append(c)
+        yield [(a, children.get(a.id, [])) for a in apps]
+
+
+def _ndjson_chunk(batch) -> str:
+    lines = []
+    for app, children in batch:
+        data = _app_dict(app)
+        data["children"] = [_child_dict(c) for c in children]
+        lines.append(json.dumps(data, ensure_ascii=False))
+    return "\n".join(lines) + "\n"
+
+
+def _csv_chunk(batch) -> str:
+    # одна строка на ребёнка; заявка без детей — одна строка с пустыми полями ребёнка
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    for app, children in batch:
+        data = _app_dict(app)
+        data["objects"] = ";".join(data["objects"] or [])
+        base = list(data.values())
+        if not children:
+            writer.writerow(base + [None] * 5)
+        for c in children:
+            writer.writerow(base + list(_child_dict(c).values()))
+    return buf.getvalue()
+
+
+def stream_export(fmt: str, filters: dict):
+    """
+    Генератор для StreamingResponse. Открывает свою сессию: зависимость get_db
+    закрывается раньше, чем начинается отдача тела ответа.
+    """
+    db = SessionLocal()
+    try:
+        if fmt == "csv":
+            buf = io.StringIO()
+            csv.writer(buf).writerow(CSV_HEADER)
+            yield buf.getvalue()
+
+        for batch in iter_application_batches(db, filters):
+            yield _ndjson_chunk(batch) if fmt == "ndjson" else _csv_chunk(batch)
+    finally:
+        db.close()
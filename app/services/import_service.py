@@ -0,0 +1,218 @@
+import csv
+import io
+import json
+import uuid
+from collections import Counter
+from typing import Iterator, TextIO
+from pydantic import ValidationError
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.models import ApplicationStatus, ChildStatus
+from app.schemas.application import ApplicationCreate
+from app.repositories.application_repo import invalidate_registration_status
+from app.repositories.audit_repo import bulk_add_audit
+from app.services.application_service import CHILD_STATUS_FOR, application_rule_error
+from app.services.stats_service import apply_deltas, application_deltas
+
+IMPORT_FORMATS = {"csv", "ndjson"}
+IMPORT_BATCH_SIZE = 5000
+# сколько ошибок возвращать в ответе (все считаются в errors_total)
+MAX_REPORTED_ERRORS = 1000
+
+# CSV: одна строка на ребёнка, строки с одинаковым ref (идущие подряд) — одна заявка,
+# поля заявки берутся из первой строки группы; objects через ";".
+CSV_COLUMNS = [
+    "ref", "full_name", "whatsapp_phone", "email", "is_investor", "objects", "contract_number",
+    "children_total", "children_coming", "consent", "child_full_name", "child_age",
+]
+
+_STAGING_DDL = """
+CREATE TEMP TABLE import_applications (
+    row_no integer NOT NULL,
+    id uuid NOT NULL,
+    full_name text NOT NULL,
+    whatsapp_phone text NOT NULL,
+    email text NOT NULL,
+    is_investor boolean NOT NULL,
+    objects jsonb NOT NULL,
+    contract_number text,
+    children_total integer NOT NULL,
+    children_coming integer NOT NULL,
+    consent boolean NOT NULL
+) ON COMMIT DROP;
+CREATE TEMP TABLE import_children (
+    id uuid NOT NULL,
+    application_id uuid NOT NULL,
+    full_name text NOT NULL,
+    age integer NOT NULL
+) ON COMMIT DROP;
+"""
+
+# одна заявка на email: пропускаем уже зарегистрированные и повторы внутри файла
+_MERGE_SQL = """
+WITH candidates AS (
+    SELECT s.*, row_number() OVER (PARTITION BY lower(btrim(s.email)) ORDER BY s.row_no) AS rn
+    FROM import_applications s
+),
+inserted AS (
+    INSERT INTO applications (
+        id, full_name, whatsapp_phone, email, is_investor, objects, contract_number,
+        children_total, children_coming, consent, status, created_at, updated_at
+    )
+    SELECT id, full_name, whatsapp_phone, email, is_investor, objects, contract_number,
+           children_total, children_coming, consent, CAST(:status AS applicationstatus), now(), now()
+    FROM candidates c
+    WHERE c.rn = 1
+      AND NOT EXISTS (SELECT 1 FROM applications a WHERE a.email_normalized = lower(btrim(c.email)))
+    RETURNING id
+),
+children_inserted AS (
+    INSERT INTO children (id, application_id, full_name, age, status, checked_at, created_at, updated_at)
+    SELECT ic.id, ic.application_id, ic.full_name, ic.age, CAST(:child_status AS childstatus),
+           CASE WHEN :child_status <> 'PENDING' THEN now() END, now(), now()
+    FROM import_children ic JOIN inserted i ON i.id = ic.application_id
+)
+SELECT id FROM inserted
+"""
+
+
+def _iter_ndjson(stream: TextIO) -> Iterator[tuple[int, dict | None, str | None]]:
+    for line_no, line in enumerate(stream, 1):
+        if not line.strip():
+            continue
+        try:
+            yield line_no, json.loads(line), None
+        except json.JSONDecodeError as e:
+            yield line_no, None, f"invalid JSON: {e.msg}"
+
+
+def _iter_csv(stream: TextIO) -> Iterator[tuple[int, dict | None, str | None]]:
+    reader = csv.DictReader(stream)
+    missing = set(CSV_COLUMNS) - set(reader.fieldnames or [])
+    if missing:
+        raise ValueError(f"CSV is missing columns: {', '.join(sorted(missing))}")
+
+    group_ref, group_row, record = None, 0, None
+    for row in reader:
+        row_no = reader.line_num
+        if record is None or row["ref"] != group_ref:
+            if record is not None:
+                yield group_row, record, None
+            group_ref, group_row = row["ref"], row_no
+            record = {
+                "full_name": row["full_name"],
+                "whatsapp_phone": row["whatsapp_phone"],
+                "email": row["email"],
+                "is_investor": row["is_investor"],
+                "objects": [o.strip() for o in (row["objects"] or "").split(";") if o.strip()],
+                "contract_number": row["contract_number"] or None,
+                "children_total": row["children_total"],
+                "children_coming": row["children_coming"],
+                "consent": row["consent"],
+                "children": [],
+            }
+        if row["child_full_name"]:
+            record["children"].append({"full_name": row["child_full_name"], "age": row["child_age"]})
+    if record is not None:
+        yield group_row, record, None
+
+
+def _validate(raw: dict) -> tuple[ApplicationCreate | None, str | None]:
+    try:
+        dto = ApplicationCreate.model_validate(raw)
+    except ValidationError as e:
+        err = e.errors()[0]
+        return None, f"{'.'.join(map(str, err['loc']))}: {err['msg']}"
+    return dto, application_rule_error(dto)
+
+
+def _copy(cursor, table: str, columns: list[str], rows: list[tuple]):
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerows(rows)
+    buf.seek(0)
+    cursor.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buf)
+
+
+def _load_batch(db: Session, batch: list[tuple[int, uuid.UUID, ApplicationCreate]], status: ApplicationStatus) -> set[uuid.UUID]:
+    """COPY в temp-таблицы и set-based перенос в applications/children. Возвращает id вставленных заявок."""
+    db.execute(text(_STAGING_DDL))
+
+    app_rows, child_rows = [], []
+    for row_no, app_id, dto in batch:
+        app_rows.append((
+            row_no, app_id, dto.full_name, dto.whatsapp_phone, dto.email, dto.is_investor,
+            json.dumps(dto.objects, ensure_ascii=False), dto.contract_number,
+            dto.children_total, dto.children_coming, dto.consent,
+        ))
+        child_rows.extend((uuid.uuid4(), app_id, c.full_name, c.age) for c in dto.children)
+
+    cursor = db.connection().connection.cursor()
+    try:
+        _copy(cursor, "import_applications", [
+            "row_no", "id", "full_name", "whatsapp_phone", "email", "is_investor", "objects",
+            "contract_number", "children_total", "children_coming", "consent",
+        ], app_rows)
+        _copy(cursor, "import_children", ["id", "application_id", "full_name", "age"], child_rows)
+    finally:
+        cursor.close()
+
+    return set(db.execute(text(_MERGE_SQL), {
+        "status": status.value, "child_status": CHILD_STATUS_FOR.get(status, ChildStatus.PENDING).value,
+    }).scalars())
+
+
+def import_applications(db: Session, stream: TextIO, fmt: str, status: ApplicationStatus, actor: str) -> dict:
+    """
+    Импорт заявок без документов (CSV/NDJSON). Валидация — теми же схемами, что и публичная форма,
+    загрузка — пачками по IMPORT_BATCH_SIZE через COPY, каждая пачка в своей транзакции.
+    Заявки с уже зарегистрированным email пропускаются.
+    """
+    records = _iter_csv(stream) if fmt == "csv" else _iter_ndjson(stream)
+    import_id = str(uuid.uuid4())
+    report = {"import_id": import_id, "inserted": 0, "skipped": 0, "errors_total": 0, "errors": []}
+
+    def error(row_no: int, msg: str):
+        report["errors_total"] += 1
+        if len(report["errors"]) < MAX_REPORTED_ERRORS:
+            report["errors"].append({"row": row_no, "error": msg})
+
+    def flush(batch):
+        if not batch:
+            return
+        inserted = _load_batch(db, batch, status)
+        deltas = Counter()
+        emails = []
+        for row_no, app_id, dto in batch:
+            if app_id in inserted:
+                deltas.update(application_deltas(status, dto.is_investor, dto.objects, dto.children_coming))
+                emails.append(dto.email)
+            else:
+                report["skipped"] += 1
+                error(row_no, "email already registered")
+        report["inserted"] += len(inserted)
+        apply_deltas(db, deltas)
+        bulk_add_audit(db, [dict(
+            actor=actor, entity_type="import", entity_id=import_id, action="import",
+            payload={"inserted": len(inserted), "rows": len(batch), "status": status.value},
+        )])
+        db.commit()
+        invalidate_registration_status(*emails)
+
+    batch = []
+    for row_no, raw, parse_error in records:
+        if parse_error:
+            error(row_no, parse_error)
+            continue
+        dto, rule_error = _validate(raw)
+        if rule_error:
+            error(row_no, rule_error)
+            continue
+        batch.append((row_no, uuid.uuid4(), dto))
+        if len(batch) >= IMPORT_BATCH_SIZE:
+            flush(batch)
+            batch = []
+    flush(batch)
+
+    return report
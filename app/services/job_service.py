@@ -0,0 +1,156 @@
+"""
+Очередь фоновых задач на Postgres (таблица jobs).
+
+Задача ставится в той же транзакции, что и данные, которые её породили: откат заявки — нет задачи.
+Воркер (app/worker.py) забирает задачи через FOR UPDATE SKIP LOCKED, так что несколько потоков
+и процессов не мешают друг другу. Неудачная задача повторяется с экспоненциальной задержкой,
+после max_attempts остаётся в статусе dead с последней ошибкой.
+"""
+import logging
+import random
+import traceback
+import uuid
+from datetime import datetime
+from typing import Callable
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models import Application, Job, JobStatus
+from app.services.notifier import get_notifier
+
+logger = logging.getLogger(__name__)
+
+JOB_HANDLERS: dict[str, Callable[[Session, dict], None]] = {}
+
+
+class PermanentJobError(Exception):
+    """Ошибка, которую повтор не исправит: задача сразу уходит в dead."""
+
+
+def job_handler(kind: str):
+    def register(fn):
+        JOB_HANDLERS[kind] = fn
+        return fn
+    return register
+
+
+def enqueue_job(db, kind: str, payload: dict, max_attempts: int | None = None, run_after: datetime | None = None) -> Job:
+    """
+    Добавляет задачу в текущую сессию (sync или async) — commit делает вызывающий код.
+    """
+    job = Job(
+        kind=kind,
+        payload=payload,
+        status=JobStatus.QUEUED,
+        attempts=0,
+        max_attempts=max_attempts or settings.JOBS_MAX_ATTEMPTS,
+        run_after=run_after or datetime.utcnow(),
+        created_at=datetime.utcnow(),
+    )
+    db.add(job)
+    return job
+
+
+_CLAIM_SQL = text("""
+UPDATE jobs SET status = 'running', attempts = attempts + 1, locked_at = now() AT TIME ZONE 'utc', locked_by = :worker
+WHERE id = (
+    SELECT id FROM jobs
+    WHERE status = 'queued' AND run_after <= now() AT TIME ZONE 'utc'
+    ORDER BY run_after
+    LIMIT 1
+    FOR UPDATE SKIP LOCKED
+)
+RETURNING id, kind, payload, attempts, max_attempts
+""")
+
+_COMPLETE_SQL = text("""
+UPDATE jobs SET status = 'done', finished_at = now() AT TIME ZONE 'utc', locked_at = NULL, last_error = NULL
+WHERE id = :id AND locked_by = :worker
+""")
+
+_FAIL_SQL = text("""
+UPDATE jobs SET status = :status, last_error = :error, locked_at = NULL,
+    run_after = now() AT TIME ZONE 'utc' + make_interval(secs => :delay),
+    finished_at = CASE WHEN :status = 'dead' THEN now() AT TIME ZONE 'utc' END
+WHERE id = :id AND locked_by = :worker
+""")
+
+# задачи упавших воркеров: lease истёк — обратно в очередь (попытка уже засчитана при захвате)
+_REQUEUE_STALE_SQL = text("""
+UPDATE jobs SET status = CASE WHEN attempts >= max_attempts THEN 'dead' ELSE 'queued' END,
+    locked_at = NULL, locked_by = NULL,
+    last_error = coalesce(last_error, 'lease expired'),
+    run_after = now() AT TIME ZONE 'utc'
+WHERE status = 'running' AND locked_at < now() AT TIME ZONE 'utc' - make_interval(secs => :lease)
+""")
+
+
+def backoff_seconds(attempt: int) -> float:
+    delay = min(settings.JOBS_BACKOFF_MAX_SECONDS, settings.JOBS_BACKOFF_BASE_SECONDS * 2 ** (attempt - 1))
+    # jitter, чтобы пачка упавших задач не повторялась синхронно
+    return delay * random.uniform(0.5, 1.0)
+
+
+def claim_job(db: Session, worker: str):
+    row = db.execute(_CLAIM_SQL, {"worker": worker}).first()
+    db.commit()
+    return row
+
+
+def requeue_stale_jobs(db: Session) -> int:
+    count = db.execute(_REQUEUE_STALE_SQL, {"lease": settings.JOBS_LEASE_SECONDS}).rowcount
+    db.commit()
+    return count
+
+
+def run_one(db: Session, worker: str) -> bool:
+    """Забирает и выполняет одну задачу. False — очередь пуста."""
+    job = claim_job(db, worker)
+    if job is None:
+        return False
+
+    handler = JOB_HANDLERS.get(job.kind)
+    try:
+        if handler is None:
+            raise PermanentJobError(f"unknown job kind: {job.kind}")
+        handler(db, job.payload)
+        db.execute(_COMPLETE_SQL, {"id": job.id, "worker": worker})
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        dead = isinstance(e, PermanentJobError) or job.attempts >= job.max_attempts
+        delay = 0 if dead else backoff_seconds(job.attempts)
+        logger.warning("job %s (%s) attempt %s failed%s: %s", job.id, job.kind, job.attempts, ", dead" if dead else "", e)
+        db.execute(_FAIL_SQL, {
+            "id": job.id,
+            "worker": worker,
+            "status": JobStatus.DEAD if dead else JobStatus.QUEUED,
+            "error": traceback.format_exc(limit=20),
+            "delay": delay,
+        })
+        db.commit()
+    return True
+
+
+# ---- встроенные задачи ----
+
+SEND_CONFIRMATION = "send_confirmation"
+
+
+@job_handler(SEND_CONFIRMATION)
+def send_confirmation(db: Session, payload: dict):
+    app = db.get(Application, uuid.UUID(payload["application_id"]))
+    if app is None:
+        raise PermanentJobError("application not found")
+
+    get_notifier().send(
+        app.email,
+        "Заявка принята",
+        f"Здравствуйте, {app.full_name}!\n\n"
+        f"Ваша заявка {app.id} зарегистрирована, текущий статус: {app.status.value}.",
+    )
+
+
+def enqueue_confirmation(db, app: Application) -> Job:
+    return enqueue_job(db, SEND_CONFIRMATION, {"application_id": str(app.id)})
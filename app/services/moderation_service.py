@@ -1,61 +1,145 @@
+import uuid
+from collections import Counter, defaultdict
 from datetime import datetime
+from sqlalchemy import update, select, any_, bindparam, case, cast, func
+from sqlalchemy.dialects.postgresql import ARRAY, UUID
 from sqlalchemy.orm import Session
-from app.models import Child, Application, ChildStatus, ApplicationStatus, AuditLog
+from app.models import Child, Application, ChildStatus, ApplicationStatus
+from app.repositories.application_repo import invalidate_registration_status
+from app.repositories.audit_repo import bulk_add_audit
+from app.services.application_service import ADMIN_REJECT_REASON, _chunks
+from app.services.stats_service import apply_deltas, status_change_deltas
+from app.services.detail_service import invalidate_application_detail
 
+# заявка, у которой отклонены все дети
+CHILDREN_REJECT_REASON = "Отклонены все дети"
 
-def recompute_application_status(db: Session, application_id):
-    app = db.query(Application).filter(Application.id == application_id).first()
-    if not app:
-        return
+_ids = bindparam("ids", type_=ARRAY(UUID(as_uuid=True)))
 
-    statuses = [c.status for c in app.children]
 
-    if not statuses:
-        app.status = ApplicationStatus.NEW
-        return
+def application_status_expr():
+    """
+    Статус заявки по статусам её детей (агрегат в GROUP BY application_id):
+    есть непроверенные -> NEW, иначе есть одобренные -> APPROVED, иначе REJECTED.
+    """
+    pending = func.count().filter(Child.status == ChildStatus.PENDING)
+    approved = func.count().filter(Child.status == ChildStatus.APPROVED)
+    return cast(
+        case(
+            (pending > 0, ApplicationStatus.NEW.value),
+            (approved > 0, ApplicationStatus.APPROVED.value),
+            else_=ApplicationStatus.REJECTED.value,
+        ),
+        Application.status.type,
+    )
 
-    if all(s == ChildStatus.APPROVED for s in statuses):
-        app.status = ApplicationStatus.APPROVED
-    elif all(s == ChildStatus.REJECTED for s in statuses):
-        app.status = ApplicationStatus.REJECTED
-    elif any(s == ChildStatus.PENDING for s in statuses):
-        # есть еще непроверенные и уже есть решения -> все равно PARTIAL,
-        # иначе NEW. Упростим: если есть хотя бы одно решение -> PARTIAL.
-        has_decision = any(s in (ChildStatus.APPROVED, ChildStatus.REJECTED) for s in statuses)
-        app.status = ApplicationStatus.PARTIAL if has_decision else ApplicationStatus.NEW
-    else:
-        app.status = ApplicationStatus.PARTIAL
 
+def recompute_application_statuses(db: Session, app_ids: list[uuid.UUID]):
+    """
+    Пересчитывает статусы заявок одним UPDATE по агрегату children GROUP BY application_id.
+    Строки заявок должны быть уже заблокированы вызывающим кодом.
+    Возвращает строки (id, email_normalized, children_coming, old_status, status) изменившихся заявок.
+    """
+    agg = (
+        select(Child.application_id, application_status_expr().label("status"))
+        .where(Child.application_id == any_(_ids))
+        .group_by(Child.application_id)
+        .cte("agg")
+    )
+    old = select(Application.id, Application.status).where(Application.id == any_(_ids)).cte("old")
+    stmt = (
+        update(Application)
+        .where(Application.id == agg.c.application_id, Application.id == old.c.id, Application.status != agg.c.status)
+        .values(
+            status=agg.c.status,
+            reject_reason=case(
+                (agg.c.status == ApplicationStatus.REJECTED, func.coalesce(Application.reject_reason, CHILDREN_REJECT_REASON)),
+                else_=None,
+            ),
+            updated_at=datetime.utcnow(),
+        )
+        .returning(
+            Application.id, Application.email_normalized, Application.children_coming,
+            old.c.status.label("old_status"), Application.status,
+        )
+        .execution_options(synchronize_session=False)
+    )
+    rows = []
+    for chunk in _chunks(app_ids):
+        rows.extend(db.execute(stmt, {"ids": chunk}).all())
+    return rows
 
-def approve_child(db: Session, child: Child, actor: str):
-    child.status = ChildStatus.APPROVED
-    child.reject_reason = None
-    child.checked_by = actor
-    child.checked_at = datetime.utcnow()
 
-    db.add(AuditLog(
-        actor=actor,
-        entity_type="child",
-        entity_id=str(child.id),
-        action="approve",
-        payload={"application_id": str(child.application_id)},
-    ))
+def moderate_children(db: Session, decisions: list[tuple[uuid.UUID, ChildStatus, str | None]], actor: str):
+    """
+    Пакетная модерация детей: decisions — (child_id, APPROVED|REJECTED, reason).
+    Один UPDATE на (статус, причина) и чанк, пересчёт родителей одним агрегатом, audit одним INSERT.
+    Всё в одной транзакции. Возвращает ошибки для id, которых нет в базе.
+    """
+    now = datetime.utcnow()
+    # повторный id — действует последнее решение
+    by_child = {child_id: (status, reason) for child_id, status, reason in decisions}
+    groups: dict[tuple[ChildStatus, str | None], list[uuid.UUID]] = defaultdict(list)
+    for child_id, (status, reason) in by_child.items():
+        if status == ChildStatus.REJECTED:
+            reason = reason or ADMIN_REJECT_REASON
+        else:
+            reason = None
+        groups[(status, reason)].append(child_id)
+
+    # блокируем родителей заранее и в одном порядке: параллельные пакеты по тем же заявкам
+    # не дедлочатся и не пересчитывают статус по устаревшим данным
+    lock = (
+        select(Application.id)
+        .where(Application.id.in_(select(Child.application_id).where(Child.id == any_(_ids))))
+        .order_by(Application.id)
+        .with_for_update()
+    )
+    app_ids: set[uuid.UUID] = set()
+    for chunk in _chunks(list(by_child)):
+        app_ids.update(db.execute(lock, {"ids": chunk}).scalars())
+
+    found: set[uuid.UUID] = set()
+    audit = []
+    for (status, reason), child_ids in groups.items():
+        stmt = (
+            update(Child)
+            .where(Child.id == any_(_ids))
+            .values(status=status, reject_reason=reason, checked_by=actor, checked_at=now, updated_at=now)
+            .returning(Child.id, Child.application_id)
+            .execution_options(synchronize_session=False)
+        )
+        action = "approve" if status == ChildStatus.APPROVED else "reject"
+        for chunk in _chunks(child_ids):
+            for r in db.execute(stmt, {"ids": chunk}):
+                found.add(r.id)
+                payload = {"application_id": str(r.application_id)}
+                if reason:
+                    payload["reason"] = reason
+                audit.append(dict(actor=actor, entity_type="child", entity_id=str(r.id), action=action, payload=payload))
+
+    changed = recompute_application_statuses(db, sorted(app_ids))
+    deltas = Counter()
+    for r in changed:
+        deltas.update(status_change_deltas(r.old_status, r.status, r.children_coming))
+        audit.append(dict(
+            actor=actor, entity_type="application", entity_id=str(r.id), action="recompute",
+            payload={"from": r.old_status.value, "to": r.status.value},
+        ))
 
-    recompute_application_status(db, child.application_id)
+    for chunk in _chunks(audit):
+        bulk_add_audit(db, chunk)
+    apply_deltas(db, deltas)
+    db.commit()
+
+    invalidate_registration_status(*(r.email_normalized for r in changed))
+    invalidate_application_detail(*app_ids)
+    return [(str(child_id), "Child not found") for child_id in by_child if child_id not in found]
+
+
+def approve_child(db: Session, child: Child, actor: str):
+    return moderate_children(db, [(child.id, ChildStatus.APPROVED, None)], actor)
 
 
 def reject_child(db: Session, child: Child, actor: str, reason: str):
-    child.status = ChildStatus.REJECTED
-    child.reject_reason = reason
-    child.checked_by = actor
-    child.checked_at = datetime.utcnow()
-
-    db.add(AuditLog(
-        actor=actor,
-        entity_type="child",
-        entity_id=str(child.id),
-        action="reject",
-        payload={"application_id": str(child.application_id), "reason": reason},
-    ))
-
-    recompute_application_status(db, child.application_id)
+    return moderate_children(db, [(child.id, ChildStatus.REJECTED, reason)], actor)
@@ -0,0 +1,30 @@
+"""
+Уведомления заявителям. Реализация выбирается настройкой NOTIFIER_BACKEND (dotted path к классу
+с методом send), так что почту/мессенджер можно подключить без правок в задачах.
+"""
+import importlib
+import logging
+from functools import lru_cache
+from typing import Protocol
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class Notifier(Protocol):
+    def send(self, to: str, subject: str, body: str) -> None:
+        """Отправляет сообщение. Исключение = неудачная попытка, задача будет повторена."""
+
+
+class LogNotifier:
+    """Локальная заглушка: ничего не отправляет, только пишет в лог."""
+
+    def send(self, to: str, subject: str, body: str) -> None:
+        logger.info("notification to %s: %s\n%s", to, subject, body)
+
+
+@lru_cache(maxsize=1)
+def get_notifier() -> Notifier:
+    module_name, _, class_name = settings.NOTIFIER_BACKEND.rpartition(".")
+    return getattr(importlib.import_module(module_name), class_name)()
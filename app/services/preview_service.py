@@ -0,0 +1,126 @@
+import logging
+import os
+import threading
+import uuid
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from pathlib import Path
+from app.core.config import settings
+from app.services.storage_backend import get_storage
+
+logger = logging.getLogger(__name__)
+
+PREVIEW_SIZES = (320, 1280)
+PREVIEWABLE_MIME = {"image/jpeg", "image/png"}
+
+_FORMATS = {"webp": ("WEBP", "image/webp"), "jpeg": ("JPEG", "image/jpeg")}
+
+_pool: ProcessPoolExecutor | None = None
+_pool_lock = threading.Lock()
+
+
+def preview_mime() -> str:
+    return _FORMATS[settings.PREVIEW_FORMAT][1]
+
+
+def preview_rel_path(storage_path: str, size: int) -> str:
+    # превью лежит рядом с оригиналом: birth_certs/ab/cd/<sha256>.320.webp
+    return f"{storage_path}.{size}.{settings.PREVIEW_FORMAT}"
+
+
+def render_previews(abs_path: str, sizes: tuple[int, ...], fmt: str) -> list[str]:
+    """Выполняется в процессе пула. Pillow импортируется здесь, чтобы API стартовал и без него."""
+    from PIL import Image, ImageOps
+
+    pil_format = _FORMATS[fmt][0]
+    written = []
+    with Image.open(abs_path) as im:
+        im = ImageOps.exif_transpose(im)
+        if im.mode not in ("RGB", "L"):
+            im = im.convert("RGB")
+        for size in sizes:
+            dst = f"{abs_path}.{size}.{fmt}"
+            if os.path.exists(dst):
+                continue
+            thumb = im.copy()
+            thumb.thumbnail((size, size))
+            # уникальное имя: тот же файл могут рендерить параллельно (загрузка и ensure_preview)
+            tmp = f"{dst}.{os.getpid()}.{uuid.uuid4().hex}.tmp"
+            try:
+                thumb.save(tmp, format=pil_format, quality=80)
+                os.replace(tmp, dst)
+            except BaseException:
+                if os.path.exists(tmp):
+                    os.remove(tmp)
+                raise
+            written.append(dst)
+    return written
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=settings.PREVIEW_WORKERS)
+        return _pool
+
+
+def shutdown_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+def _log_failure(future):
+    exc = future.exception()
+    if exc is not None:
+        logger.warning("preview rendering failed: %s", exc)
+
+
+def schedule_previews(files: list[tuple[str, str]]):
+    """
+    Ставит в пул генерацию превью для [(storage_path, mime), ...] и сразу возвращается.
+    Вызывать после commit: если заявка не сохранилась, превью не нужны.
+    """
+    root = get_storage().local_root
+    if not settings.PREVIEW_ENABLED or root is None:
+        return
+    seen = set()
+    for storage_path, mime in files:
+        if mime not in PREVIEWABLE_MIME or storage_path in seen:
+            continue
+        seen.add(storage_path)
+        abs_path = str(root / storage_path)
+        try:
+            future = _get_pool().submit(render_previews, abs_path, PREVIEW_SIZES, settings.PREVIEW_FORMAT)
+        except RuntimeError as e:
+            logger.warning("preview pool unavailable: %s", e)
+            return
+        future.add_done_callback(_log_failure)
+
+
+def ensure_preview(storage_path: str, mime: str, size: int) -> Path | None:
+    """
+    Путь к готовому превью. Если его ещё нет — рендерит в пуле и ждёт не дольше
+    PREVIEW_TIMEOUT_SECONDS. None — превью не будет (pdf, нет Pillow, ошибка), отдавайте оригинал.
+    """
+    root = get_storage().local_root
+    if root is None:
+        # превью рендерятся из локального файла; с S3 отдаётся оригинал
+        return None
+    abs_preview = root / preview_rel_path(storage_path, size)
+    if abs_preview.exists():
+        return abs_preview
+    if not settings.PREVIEW_ENABLED or mime not in PREVIEWABLE_MIME:
+        return None
+
+    abs_path = str(root / storage_path)
+    try:
+        _get_pool().submit(render_previews, abs_path, PREVIEW_SIZES, settings.PREVIEW_FORMAT).result(
+            timeout=settings.PREVIEW_TIMEOUT_SECONDS
+        )
+    except (FutureTimeout, Exception) as e:
+        logger.warning("preview for %s not ready: %s", storage_path, e)
+        return None
+    return abs_preview if abs_preview.exists() else None
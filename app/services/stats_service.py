@@ -0,0 +1,125 @@
+from collections import Counter
+from sqlalchemy import text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.models import StatsCounter, ApplicationStatus
+
+# ключи stats_counters:
+#   total, status:<STATUS>, investor:true|false, object:<name>,
+#   children_coming, children_coming:status:<STATUS>
+
+
+def _status_value(status) -> str:
+    return status.value if isinstance(status, ApplicationStatus) else str(status)
+
+
+def application_deltas(status, is_investor: bool, objects: list[str] | None, children_coming: int, sign: int = 1) -> Counter:
+    """Вклад одной заявки в счётчики (sign=-1 — убрать вклад)."""
+    s = _status_value(status)
+    d = Counter()
+    d["total"] += sign
+    d[f"status:{s}"] += sign
+    d[f"investor:{'true' if is_investor else 'false'}"] += sign
+    for obj in set(objects or []):
+        d[f"object:{obj}"] += sign
+    d["children_coming"] += sign * children_coming
+    d[f"children_coming:status:{s}"] += sign * children_coming
+    return d
+
+
+def status_change_deltas(old_status, new_status, children_coming: int) -> Counter:
+    old, new = _status_value(old_status), _status_value(new_status)
+    d = Counter()
+    if old == new:
+        return d
+    d[f"status:{old}"] -= 1
+    d[f"status:{new}"] += 1
+    d[f"children_coming:status:{old}"] -= children_coming
+    d[f"children_coming:status:{new}"] += children_coming
+    return d
+
+
+def deltas_statement(deltas: Counter):
+    """Upsert, прибавляющий дельты к stats_counters, или None, если прибавлять нечего."""
+    rows = [{"key": k, "value": v} for k, v in sorted(deltas.items()) if v]
+    if not rows:
+        return None
+    stmt = insert(StatsCounter).values(rows)
+    return stmt.on_conflict_do_update(
+        index_elements=[StatsCounter.key],
+        set_={"value": StatsCounter.value + stmt.excluded.value},
+    )
+
+
+def apply_deltas(db: Session, deltas: Counter):
+    """
+    Одним upsert'ом прибавляет дельты в текущей транзакции. Строки счётчиков горячие —
+    вызывать как можно ближе к commit, чтобы не держать их блокировки долго.
+    """
+    stmt = deltas_statement(deltas)
+    if stmt is not None:
+        db.execute(stmt)
+
+
+def get_stats(db: Session) -> dict:
+    return stats_from_rows(db.query(StatsCounter.key, StatsCounter.value))
+
+
+def stats_from_rows(rows) -> dict:
+    by_status = {s.value: 0 for s in ApplicationStatus}
+    coming_by_status = {s.value: 0 for s in ApplicationStatus}
+    stats = {
+        "total": 0,
+        "by_status": by_status,
+        "investors": {"true": 0, "false": 0},
+        "objects": {},
+        "children_coming": 0,
+        "children_coming_by_status": coming_by_status,
+    }
+    for key, value in rows:
+        kind, _, name = key.partition(":")
+        if kind == "total":
+            stats["total"] = value
+        elif kind == "status":
+            by_status[name] = value
+        elif kind == "investor":
+            stats["investors"][name] = value
+        elif kind == "object":
+            if value:
+                stats["objects"][name] = value
+        elif key == "children_coming":
+            stats["children_coming"] = value
+        elif kind == "children_coming":
+            coming_by_status[name.removeprefix("status:")] = value
+    return stats
+
+
+_REBUILD_SQL = """
+INSERT INTO stats_counters (key, value)
+SELECT 'total', count(*) FROM applications
+UNION ALL
+SELECT 'status:' || status, count(*) FROM applications GROUP BY status
+UNION ALL
+SELECT 'investor:' || CASE WHEN is_investor THEN 'true' ELSE 'false' END, count(*)
+FROM applications GROUP BY is_investor
+UNION ALL
+SELECT 'object:' || o.name, count(DISTINCT a.id)
+FROM applications a CROSS JOIN LATERAL jsonb_array_elements_text(a.objects) AS o(name)
+GROUP BY o.name
+UNION ALL
+SELECT 'children_coming', coalesce(sum(children_coming), 0) FROM applications
+UNION ALL
+SELECT 'children_coming:status:' || status, sum(children_coming) FROM applications GROUP BY status
+"""
+
+
+def rebuild_stats(db: Session):
+    """
+    Пересчитывает счётчики с нуля. EXCLUSIVE-блокировка stats_counters ждёт уже
+    идущие записи и держит новые до commit, поэтому их дельты не теряются и не удваиваются.
+    """
+    db.execute(text("LOCK TABLE stats_counters IN EXCLUSIVE MODE"))
+    db.execute(text("DELETE FROM stats_counters"))
+    db.execute(text(_REBUILD_SQL))
+    db.commit()
@@ -0,0 +1,244 @@
+"""
+Хранилище документов: ключ — storage_path из files/blobs (birth_certs/ab/cd/<sha256>).
+
+STORAGE_BACKEND=local — каталог STORAGE_ROOT (как раньше), s3 — любое S3-совместимое хранилище
+(AWS, MinIO). Для s3 файлы отдаются редиректом на presigned GET, байты через Python не идут.
+"""
+import os
+from functools import lru_cache
+from pathlib import Path
+from typing import Iterable, Iterator, NamedTuple, Protocol
+
+from app.core.config import settings
+
+READ_CHUNK = 1024 * 1024
+
+
+class ObjectStat(NamedTuple):
+    size: int
+    mtime: float
+
+
+class StorageBackend(Protocol):
+    # каталог на локальном диске или None: превью, X-Accel-Redirect и обслуживание хранилища работают только с ним
+    local_root: Path | None
+
+    def save_stream(self, key: str, chunks: Iterable[bytes]) -> int:
+        """Пишет объект из потока кусков, возвращает размер. Исключение из chunks — ничего не остаётся."""
+
+    def exists(self, key: str) -> bool: ...
+
+    def stat(self, key: str) -> ObjectStat | None: ...
+
+    def move(self, src: str, dst: str) -> None: ...
+
+    def touch(self, key: str) -> None:
+        """Обновить время изменения (защита от сборки мусора), где это имеет смысл."""
+
+    def delete(self, key: str) -> None:
+        """Удаляет объект; отсутствие объекта — не ошибка."""
+
+    def open_range(self, key: str, start: int = 0, end: int | None = None) -> Iterator[bytes]:
+        """Байты [start, end] включительно (end=None — до конца) кусками по READ_CHUNK."""
+
+    def presigned_url(self, key: str, filename: str, mime: str) -> str | None:
+        """Временная ссылка на скачивание или None, если бэкенд так не умеет."""
+
+
+class LocalStorage:
+    def __init__(self, root: str):
+        self.local_root = Path(root)
+
+    def path(self, key: str) -> Path:
+        return self.local_root / key
+
+    def save_stream(self, key: str, chunks: Iterable[bytes]) -> int:
+        path = self.path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        written = 0
+        try:
+            with open(path, "wb") as out:
+                for chunk in chunks:
+                    out.write(chunk)
+                    written += len(chunk)
+        except BaseException:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            raise
+        return written
+
+    def exists(self, key: str) -> bool:
+        return self.path(key).exists()
+
+    def stat(self, key: str) -> ObjectStat | None:
+        try:
+            st = self.path(key).stat()
+        except FileNotFoundError:
+            return None
+        return ObjectStat(st.st_size, st.st_mtime)
+
+    def move(self, src: str, dst: str) -> None:
+        target = self.path(dst)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(self.path(src), target)
+
+    def touch(self, key: str) -> None:
+        os.utime(self.path(key))
+
+    def delete(self, key: str) -> None:
+        try:
+            os.remove(self.path(key))
+        except FileNotFoundError:
+            pass
+
+    def open_range(self, key: str, start: int = 0, end: int | None = None) -> Iterator[bytes]:
+        with open(self.path(key), "rb") as f:
+            f.seek(start)
+            left = None if end is None else end - start + 1
+            while left is None or left > 0:
+                chunk = f.read(READ_CHUNK if left is None else min(READ_CHUNK, left))
+                if not chunk:
+                    break
+                if left is not None:
+                    left -= len(chunk)
+                yield chunk
+
+    def presigned_url(self, key: str, filename: str, mime: str) -> str | None:
+        return None
+
+
+class S3Storage:
+    """
+    S3-совместимое хранилище. Загрузка — multipart кусками по S3_MULTIPART_CHUNK_MB
+    (в памяти не больше одного куска), файлы меньше куска уходят одним PutObject.
+    boto3 импортируется здесь, чтобы локальная конфигурация работала и без него.
+    """
+
+    local_root = None
+
+    def __init__(self):
+        import boto3
+        from botocore.config import Config
+
+        self.bucket = settings.S3_BUCKET
+        self.prefix = settings.S3_PREFIX
+        self.part_size = settings.S3_MULTIPART_CHUNK_MB * 1024 * 1024
+        config = Config(signature_version="s3v4", s3={"addressing_style": settings.S3_ADDRESSING_STYLE})
+        kwargs = dict(
+            region_name=settings.S3_REGION,
+            aws_access_key_id=settings.S3_ACCESS_KEY,
+            aws_secret_access_key=settings.S3_SECRET_KEY,
+            config=config,
+        )
+        self.client = boto3.client("s3", endpoint_url=settings.S3_ENDPOINT_URL, **kwargs)
+        # presigned URL подписывается под адрес, который видит браузер (MinIO за nginx/в docker)
+        public = settings.S3_PUBLIC_ENDPOINT_URL
+        self.presign_client = boto3.client("s3", endpoint_url=public, **kwargs) if public else self.client
+
+    def _key(self, key: str) -> str:
+        return self.prefix + key
+
+    def _is_not_found(self, e) -> bool:
+        return e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound")
+
+    def save_stream(self, key: str, chunks: Iterable[bytes]) -> int:
+        buf = bytearray()
+        written = 0
+        upload_id = None
+        parts = []
+        try:
+            for chunk in chunks:
+                buf += chunk
+                written += len(chunk)
+                if len(buf) >= self.part_size:
+                    if upload_id is None:
+                        upload_id = self.client.create_multipart_upload(Bucket=self.bucket, Key=self._key(key))["UploadId"]
+                    self._upload_part(key, upload_id, parts, bytes(buf))
+                    buf.clear()
+
+            if upload_id is None:
+                self.client.put_object(Bucket=self.bucket, Key=self._key(key), Body=bytes(buf))
+                return written
+
+            if buf:
+                self._upload_part(key, upload_id, parts, bytes(buf))
+            self.client.complete_multipart_upload(
+                Bucket=self.bucket, Key=self._key(key), UploadId=upload_id, MultipartUpload={"Parts": parts}
+            )
+            return written
+        except BaseException:
+            if upload_id is not None:
+                self.client.abort_multipart_upload(Bucket=self.bucket, Key=self._key(key), UploadId=upload_id)
+            raise
+
+    def _upload_part(self, key: str, upload_id: str, parts: list, body: bytes):
+        number = len(parts) + 1
+        resp = self.client.upload_part(
+            Bucket=self.bucket, Key=self._key(key), UploadId=upload_id, PartNumber=number, Body=body
+        )
+        parts.append({"PartNumber": number, "ETag": resp["ETag"]})
+
+    def exists(self, key: str) -> bool:
+        return self.stat(key) is not None
+
+    def stat(self, key: str) -> ObjectStat | None:
+        from botocore.exceptions import ClientError
+
+        try:
+            head = self.client.head_object(Bucket=self.bucket, Key=self._key(key))
+        except ClientError as e:
+            if self._is_not_found(e):
+                return None
+            raise
+        return ObjectStat(head["ContentLength"], head["LastModified"].timestamp())
+
+    def move(self, src: str, dst: str) -> None:
+        # загрузки ограничены MAX_UPLOAD_MB, одного CopyObject (до 5 ГБ) достаточно
+        self.client.copy_object(
+            Bucket=self.bucket, Key=self._key(dst), CopySource={"Bucket": self.bucket, "Key": self._key(src)}
+        )
+        self.delete(src)
+
+    def touch(self, key: str) -> None:
+        # LastModified обновляется только перезаписью: копия объекта в себя (REPLACE обязателен для self-copy)
+        self.client.copy_object(
+            Bucket=self.bucket, Key=self._key(key), CopySource={"Bucket": self.bucket, "Key": self._key(key)},
+            MetadataDirective="REPLACE",
+        )
+
+    def delete(self, key: str) -> None:
+        # DeleteObject идемпотентен: отсутствующий ключ — тоже 204
+        self.client.delete_object(Bucket=self.bucket, Key=self._key(key))
+
+    def open_range(self, key: str, start: int = 0, end: int | None = None) -> Iterator[bytes]:
+        kwargs = {}
+        if start or end is not None:
+            kwargs["Range"] = f"bytes={start}-{'' if end is None else end}"
+        body = self.client.get_object(Bucket=self.bucket, Key=self._key(key), **kwargs)["Body"]
+        try:
+            yield from body.iter_chunks(READ_CHUNK)
+        finally:
+            body.close()
+
+    def presigned_url(self, key: str, filename: str, mime: str) -> str | None:
+        from urllib.parse import quote
+
+        return self.presign_client.generate_presigned_url(
+            "get_object",
+            Params={
+                "Bucket": self.bucket,
+                "Key": self._key(key),
+                "ResponseContentType": mime,
+                "ResponseContentDisposition": f"attachment; filename*=utf-8''{quote(filename)}",
+            },
+            ExpiresIn=settings.S3_PRESIGN_TTL_SECONDS,
+        )
+
+
+@lru_cache(maxsize=1)
+def get_storage() -> StorageBackend:
+    if settings.STORAGE_BACKEND == "s3":
+        return S3Storage()
+    return LocalStorage(settings.STORAGE_ROOT)
@@ -0,0 +1,178 @@
+"""
+Сборка мусора в хранилище документов (python -m app.cli storage-gc).
+
+1. Строки files, на которые не ссылается ни один ребёнок (упавшая отправка, удалённая заявка):
+   keyset по id пачками, удаление через file_repo.delete_files, blob'ы отпускаются как обычно.
+2. Файлы на диске, которых нет ни в files, ни в blobs: дерево birth_certs обходится потоково
+   (os.scandir), существование проверяется одним запросом на пачку путей.
+   Превью проверяются по своему оригиналу, *.tmp брошенных загрузок удаляются по возрасту.
+
+Ни дерево, ни таблица целиком в память не загружаются. Всё моложе STORAGE_GC_GRACE_HOURS
+пропускается: это могут быть загрузки, транзакция которых ещё не закоммичена.
+"""
+import os
+import re
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Iterator
+from sqlalchemy import select, exists, any_, bindparam, String
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models import File, Blob, Child
+from app.repositories.audit_repo import bulk_add_audit
+from app.repositories.file_repo import delete_files, blob_exists
+from app.services.preview_service import preview_rel_path, PREVIEW_SIZES
+
+GC_MODES = {"dry-run", "quarantine", "delete"}
+
+_PREVIEW_RE = re.compile(r"^(?P<base>.+)\.(?P<size>\d+)\.(?:webp|jpeg)$")
+_SHA256_RE = re.compile(r"^[0-9a-f]{64}$")
+
+_paths = bindparam("paths", type_=ARRAY(String))
+_digests = bindparam("digests", type_=ARRAY(String))
+_referenced_paths = (
+    select(File.storage_path).where(File.storage_path == any_(_paths))
+    .union(select(Blob.storage_path).where(Blob.digest == any_(_digests)))
+)
+
+
+class StorageGC:
+    def __init__(self, db: Session, mode: str = "dry-run", batch_size: int = 1000, grace_hours: float | None = None, log=print):
+        if mode not in GC_MODES:
+            raise ValueError(f"unknown mode: {mode}")
+        self.db = db
+        self.mode = mode
+        self.batch_size = batch_size
+        grace = timedelta(hours=settings.STORAGE_GC_GRACE_HOURS if grace_hours is None else grace_hours)
+        self.cutoff = datetime.utcnow() - grace
+        self.cutoff_ts = time.time() - grace.total_seconds()
+        self.root = Path(settings.STORAGE_ROOT)
+        self.quarantine_root = self.root / settings.STORAGE_GC_QUARANTINE_DIR / datetime.utcnow().strftime("%Y%m%dT%H%M%S")
+        self.log = log
+        self.report = {"mode": mode, "rows": 0, "files": 0, "previews": 0, "tmp": 0, "bytes": 0}
+
+    # ---- диск ----
+
+    def _dispose(self, rel: str, kind: str) -> bool:
+        src = self.root / rel
+        try:
+            st = src.stat()
+        except FileNotFoundError:
+            return False
+        if self._is_fresh(st):
+            # файл успели переиспользовать (дедупликация при загрузке трогает mtime)
+            return False
+        size = st.st_size
+        self.report[kind] += 1
+        self.report["bytes"] += size
+        self.log(f"{self.mode} {kind}: {rel} ({size} bytes)")
+        if self.mode == "delete":
+            os.remove(src)
+        elif self.mode == "quarantine":
+            dst = self.quarantine_root / rel
+            dst.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(src, dst)
+        return True
+
+    def _dispose_with_previews(self, rel: str):
+        self._dispose(rel, "files")
+        for size in PREVIEW_SIZES:
+            self._dispose(preview_rel_path(rel, size), "previews")
+
+    def _walk(self) -> Iterator[tuple[str, os.stat_result]]:
+        """(rel_path, stat) всех файлов под birth_certs; в памяти — только стек каталогов."""
+        stack = [self.root / settings.BIRTH_CERTS_DIR]
+        while stack:
+            directory = stack.pop()
+            try:
+                with os.scandir(directory) as it:
+                    for entry in it:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(Path(entry.path))
+                        elif entry.is_file(follow_symlinks=False):
+                            yield Path(entry.path).relative_to(self.root).as_posix(), entry.stat(follow_symlinks=False)
+            except FileNotFoundError:
+                continue
+
+    def _is_fresh(self, st: os.stat_result) -> bool:
+        # ctime меняется и при hardlink (storage-migrate-layout), mtime — при записи
+        return max(st.st_mtime, st.st_ctime) >= self.cutoff_ts
+
+    def _check_batch(self, batch: list[tuple[str, str, str]]):
+        """batch: [(rel, key, kind)], key — путь, по которому решается, нужен ли файл."""
+        keys = list({key for _, key, _ in batch})
+        digests = [d for d in (k.rsplit("/", 1)[-1] for k in keys) if _SHA256_RE.match(d)]
+        referenced = set(self.db.execute(_referenced_paths, {"paths": keys, "digests": digests}).scalars())
+        self.db.rollback()
+        for rel, key, kind in batch:
+            if key not in referenced:
+                self._dispose(rel, kind)
+
+    def collect_files(self):
+        quarantine = settings.STORAGE_GC_QUARANTINE_DIR + "/"
+        batch = []
+        for rel, st in self._walk():
+            if rel.startswith(quarantine) or self._is_fresh(st):
+                continue
+            if rel.endswith(".tmp"):
+                # брошенная загрузка/рендер превью: старше grace — точно никому не нужна
+                self._dispose(rel, "tmp")
+                continue
+            m = _PREVIEW_RE.match(rel)
+            if m and int(m.group("size")) in PREVIEW_SIZES:
+                batch.append((rel, m.group("base"), "previews"))
+            else:
+                batch.append((rel, rel, "files"))
+            if len(batch) >= self.batch_size:
+                self._check_batch(batch)
+                batch = []
+        if batch:
+            self._check_batch(batch)
+
+    # ---- строки files ----
+
+    def _orphan_rows(self, last_id):
+        q = select(File.id, File.storage_path, File.size).where(
+            File.created_at < self.cutoff,
+            ~exists().where(Child.birth_cert_file_id == File.id),
+            ~exists().where(Child.birth_cert_file2_id == File.id),
+        )
+        if last_id is not None:
+            q = q.where(File.id > last_id)
+        return q.order_by(File.id).limit(self.batch_size)
+
+    def collect_rows(self):
+        last_id = None
+        while True:
+            rows = self.db.execute(self._orphan_rows(last_id)).all()
+            if not rows:
+                self.db.rollback()
+                break
+            last_id = rows[-1].id
+            self.report["rows"] += len(rows)
+            for r in rows:
+                self.log(f"{self.mode} row: file {r.id} -> {r.storage_path}")
+            if self.mode == "dry-run":
+                self.db.rollback()
+                continue
+
+            orphans = delete_files(self.db, [r.id for r in rows])
+            bulk_add_audit(self.db, [dict(
+                actor="storage-gc", entity_type="file", entity_id="batch", action=f"gc_{self.mode}",
+                payload={"files": [{"id": str(r.id), "storage_path": r.storage_path} for r in rows]},
+            )])
+            self.db.commit()
+            for digest, rel in orphans:
+                if digest and blob_exists(self.db, digest):
+                    # тот же документ успели загрузить заново
+                    continue
+                self._dispose_with_previews(rel)
+            self.db.rollback()
+
+    def run(self) -> dict:
+        self.collect_rows()
+        self.collect_files()
+        return self.report
@@ -0,0 +1,122 @@
+"""
+Перенос файлов из плоского birth_certs/<name> в fan-out birth_certs/ab/cd/<name>.
+
+Пачками по id, каждая пачка — короткая транзакция с построчными UPDATE (без блокировки таблицы):
+  1. hardlink старого пути на новый (оба пути валидны, читатели не замечают переезда);
+  2. UPDATE files/blobs ... WHERE storage_path = <старый>; commit;
+  3. unlink старого пути.
+Повторный запуск продолжает с места остановки: берутся только строки, у которых путь ещё плоский.
+Если процесс упал между 2 и 3, старые ссылки остаются на диске — их уберёт сборка мусора в хранилище.
+"""
+import os
+import shutil
+import time
+from pathlib import Path
+from sqlalchemy import select, update, bindparam
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models import File, Blob
+from app.services.storage_service import fanout_rel_path
+from app.services.preview_service import preview_rel_path, PREVIEW_SIZES
+
+# Core-таблицы: executemany по списку параметров, без ORM bulk-update по первичному ключу
+_files = File.__table__
+_blobs = Blob.__table__
+_update_file = (
+    update(_files)
+    .where(_files.c.id == bindparam("b_id"), _files.c.storage_path == bindparam("b_old"))
+    .values(storage_path=bindparam("b_new"))
+)
+_update_blob = (
+    update(_blobs)
+    .where(_blobs.c.digest == bindparam("b_digest"), _blobs.c.storage_path == bindparam("b_old"))
+    .values(storage_path=bindparam("b_new"))
+)
+
+
+def _flat_files(last_id, limit: int):
+    prefix = settings.BIRTH_CERTS_DIR + "/"
+    q = select(File.id, File.storage_path, File.digest).where(
+        File.storage_path.startswith(prefix, autoescape=True),
+        ~File.storage_path.like(prefix.replace("_", "\\_") + "%/%"),
+    )
+    if last_id is not None:
+        q = q.where(File.id > last_id)
+    return q.order_by(File.id).limit(limit)
+
+
+def _link(src: Path, dst: Path) -> bool:
+    """dst — вторая ссылка на src. False, если исходника нет (и переносить нечего)."""
+    if dst.exists():
+        return True
+    if not src.exists():
+        return False
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        os.link(src, dst)
+    except FileExistsError:
+        pass
+    except OSError:
+        # hardlink не поддерживается — копируем через временный файл
+        tmp = dst.with_name(dst.name + ".tmp")
+        shutil.copy2(src, tmp)
+        os.replace(tmp, dst)
+    return True
+
+
+def migrate_flat_layout(db: Session, batch_size: int = 500, sleep: float = 0.0, dry_run: bool = False, log=print) -> dict:
+    root = Path(settings.STORAGE_ROOT)
+    report = {"files": 0, "paths": 0, "missing": 0}
+    last_id = None
+
+    while True:
+        rows = db.execute(_flat_files(last_id, batch_size)).all()
+        db.rollback()
+        if not rows:
+            break
+        last_id = rows[-1].id
+
+        moves: dict[str, str] = {}
+        file_params, blob_params, stale = [], [], []
+        for r in rows:
+            old = r.storage_path
+            new = moves.get(old) or fanout_rel_path(old.rsplit("/", 1)[-1])
+            if old not in moves:
+                if dry_run:
+                    moves[old] = new
+                elif not _link(root / old, root / new):
+                    report["missing"] += 1
+                    log(f"missing on disk: {old} (file {r.id})")
+                    continue
+                else:
+                    moves[old] = new
+                    stale.append(root / old)
+                    for size in PREVIEW_SIZES:
+                        if _link(root / preview_rel_path(old, size), root / preview_rel_path(new, size)):
+                            stale.append(root / preview_rel_path(old, size))
+                    if r.digest:
+                        blob_params.append({"b_digest": r.digest, "b_old": old, "b_new": new})
+            file_params.append({"b_id": r.id, "b_old": old, "b_new": new})
+
+        report["files"] += len(file_params)
+        report["paths"] += len(moves)
+        if dry_run:
+            continue
+
+        if file_params:
+            db.execute(_update_file, file_params)
+        if blob_params:
+            db.execute(_update_blob, blob_params)
+        db.commit()
+
+        for path in stale:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        log(f"batch up to {last_id}: files={report['files']} paths={report['paths']} missing={report['missing']}")
+        if sleep:
+            time.sleep(sleep)
+
+    return report
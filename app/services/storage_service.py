@@ -1,61 +1,156 @@
-import os
-from pathlib import Path
+import hashlib
+import time
 from fastapi import UploadFile
+from sqlalchemy.orm import Session
 from app.core.config import settings
 from app.core.exceptions import bad_request
+from app.core.metrics import UPLOAD_BYTES, UPLOAD_SECONDS
 from app.models import File
+from app.repositories.file_repo import blob_exists
+from app.services.preview_service import preview_rel_path, PREVIEW_SIZES
+from app.services.storage_backend import get_storage
 
 ALLOWED_MIME = {"application/pdf", "image/jpeg", "image/png"}
 
 
-def ensure_dirs():
-    root = Path(settings.STORAGE_ROOT)
-    (root / settings.BIRTH_CERTS_DIR).mkdir(parents=True, exist_ok=True)
-
-
 def validate_upload(file: UploadFile):
     if file.content_type not in ALLOWED_MIME:
         raise bad_request("Unsupported file type. Allowed: pdf, jpg, png")
 
 
-def save_upload_to_disk(file_id, upload: UploadFile) -> tuple[str, int]:
-    ensure_dirs()
+def fanout_rel_path(name: str) -> str:
+    """birth_certs/ab/cd/<name>: по первым 4 hex-символам имени (sha256 или uuid), до 65536 каталогов."""
+    return f"{settings.BIRTH_CERTS_DIR}/{name[:2]}/{name[2:4]}/{name}"
+
+
+def blob_rel_path(digest: str) -> str:
+    return fanout_rel_path(digest)
+
+
+def flat_rel_path(name: str) -> str:
+    # старая раскладка: все файлы в одном каталоге birth_certs
+    return f"{settings.BIRTH_CERTS_DIR}/{name}"
 
-    ext = ""
-    if upload.filename and "." in upload.filename:
-        ext = "." + upload.filename.rsplit(".", 1)[-1].lower()
 
-    rel = f"{settings.BIRTH_CERTS_DIR}/{file_id}{ext}"
-    abs_path = Path(settings.STORAGE_ROOT) / rel
-    tmp_path = str(abs_path) + ".tmp"
+def is_flat_rel_path(rel: str) -> bool:
+    return rel.startswith(settings.BIRTH_CERTS_DIR + "/") and "/" not in rel[len(settings.BIRTH_CERTS_DIR) + 1:]
+
+
+def resolve_rel_path(rel: str) -> str:
+    """
+    Путь для чтения. Плоский путь мог уже переехать в fan-out (python -m app.cli storage-migrate-layout),
+    а в кэше метаданных ещё старое значение — тогда отдаём новый путь.
+    """
+    storage = get_storage()
+    if not is_flat_rel_path(rel) or storage.exists(rel):
+        return rel
+    moved = fanout_rel_path(rel.rsplit("/", 1)[-1])
+    return moved if storage.exists(moved) else rel
+
+
+def save_upload(file_id, upload: UploadFile) -> tuple[str, int, str]:
+    """
+    Пишет загрузку во временный объект, параллельно считая sha256, и переносит её
+    в birth_certs/ab/cd/<sha256>. Если такой blob уже есть — временный объект просто удаляется.
+    Возвращает (rel_path, size, digest).
+    """
+    storage = get_storage()
+    tmp_key = f"{settings.BIRTH_CERTS_DIR}/{file_id}.tmp"
 
     max_bytes = settings.MAX_UPLOAD_MB * 1024 * 1024
-    written = 0
+    hasher = hashlib.sha256()
+    started = time.perf_counter()
 
-    with open(tmp_path, "wb") as out:
+    def chunks():
+        written = 0
         while True:
             chunk = upload.file.read(1024 * 1024)
             if not chunk:
                 break
             written += len(chunk)
             if written > max_bytes:
-                out.close()
-                try:
-                    os.remove(tmp_path)
-                except OSError:
-                    pass
+                # бэкенд удалит недописанный объект (local) или прервёт multipart (s3)
                 raise bad_request(f"File too large. Max {settings.MAX_UPLOAD_MB}MB")
-            out.write(chunk)
+            hasher.update(chunk)
+            yield chunk
+
+    written = storage.save_stream(tmp_key, chunks())
+
+    digest = hasher.hexdigest()
+    # blob мог остаться в старой плоской раскладке (до storage-migrate-layout) — переиспользуем его
+    existing = next((r for r in (blob_rel_path(digest), flat_rel_path(digest)) if storage.exists(r)), None)
+
+    if existing:
+        rel = existing
+        storage.delete(tmp_key)
+        # свежий mtime: сборка мусора не тронет blob, пока эта загрузка не закоммичена
+        storage.touch(rel)
+    else:
+        rel = blob_rel_path(digest)
+        storage.move(tmp_key, rel)
+
+    UPLOAD_BYTES.observe(written)
+    UPLOAD_SECONDS.observe(time.perf_counter() - started)
+    return rel, written, digest
+
+
+def remove_stored_file(rel_path: str):
+    """Удаляет файл и его превью."""
+    storage = get_storage()
+    for rel in (rel_path, *(preview_rel_path(rel_path, size) for size in PREVIEW_SIZES)):
+        storage.delete(rel)
+
+
+def remove_blob_if_unreferenced(db: Session, digest: str, rel_path: str):
+    """Вызывать после commit с путём из file_repo.release_blob / delete_file."""
+    if blob_exists(db, digest):
+        # кто-то успел загрузить тот же файл заново
+        return
+    st = get_storage().stat(rel_path)
+    if st is not None and st.mtime >= time.time() - settings.STORAGE_GC_GRACE_HOURS * 3600:
+        # save_upload трогает mtime до commit своей строки blobs: параллельная загрузка того же
+        # содержимого ещё не видна в blob_exists. Свежий blob оставляем сборке мусора (то же правило grace);
+        # storage-gc работает только с local, на S3 такие blob'ы остаются — лишний объект лучше битой ссылки
+        return
+    remove_stored_file(rel_path)
+
+
+def remove_orphans(db: Session, orphans: list[tuple[str | None, str]]):
+    """Вызывать после commit с результатом file_repo.delete_files."""
+    for digest, rel_path in orphans:
+        if digest:
+            remove_blob_if_unreferenced(db, digest, rel_path)
+        else:
+            remove_stored_file(rel_path)
+
+
+def file_etag(digest: str | None, rel_path: str | None = None) -> str | None:
+    """Сильный ETag: sha256 содержимого, для старых файлов без digest — size+mtime."""
+    if digest:
+        return f'"{digest}"'
+    if rel_path is None:
+        return None
+    st = get_storage().stat(rel_path)
+    if st is None:
+        return None
+    return f'"{st.size:x}-{int(st.mtime * 1e9):x}"'
+
 
-    os.replace(tmp_path, abs_path)
-    return rel, written
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = [t.strip().removeprefix("W/") for t in if_none_match.split(",")]
+    return etag in candidates
 
 
-def file_entity(file_id, rel_path: str, upload: UploadFile, size: int) -> File:
+def file_entity(file_id, rel_path: str, upload: UploadFile, size: int, digest: str | None = None) -> File:
     return File(
         id=file_id,
         storage_path=rel_path,
         original_name=upload.filename or "file",
         mime=upload.content_type or "application/octet-stream",
         size=size,
+        digest=digest,
     )
@@ -0,0 +1,80 @@
+"""
+Воркер фоновых задач: python -m app.worker [--concurrency N]
+
+Каждый поток держит свою сессию и забирает задачи по одной (FOR UPDATE SKIP LOCKED),
+поэтому воркеров можно запускать сколько угодно процессов/контейнеров параллельно.
+"""
+import argparse
+import logging
+import os
+import signal
+import socket
+import threading
+
+from app.core.config import settings
+from app.core.db import SessionLocal
+from app.services.job_service import run_one, requeue_stale_jobs
+
+logger = logging.getLogger("app.worker")
+
+
+def _loop(worker: str, stop: threading.Event):
+    db = SessionLocal()
+    try:
+        while not stop.is_set():
+            try:
+                if not run_one(db, worker):
+                    stop.wait(settings.JOBS_POLL_INTERVAL_SECONDS)
+            except Exception:
+                # потеря соединения и т.п. — не роняем поток
+                logger.exception("worker %s: poll failed", worker)
+                db.rollback()
+                stop.wait(settings.JOBS_POLL_INTERVAL_SECONDS)
+    finally:
+        db.close()
+
+
+def _reaper(stop: threading.Event):
+    interval = max(settings.JOBS_LEASE_SECONDS / 4, settings.JOBS_POLL_INTERVAL_SECONDS)
+    while not stop.wait(interval):
+        db = SessionLocal()
+        try:
+            n = requeue_stale_jobs(db)
+            if n:
+                logger.warning("requeued %s stale jobs", n)
+        except Exception:
+            logger.exception("stale jobs requeue failed")
+        finally:
+            db.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m app.worker")
+    parser.add_argument("--concurrency", type=int, default=settings.JOBS_WORKER_CONCURRENCY)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    stop = threading.Event()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, lambda *_: stop.set())
+
+    prefix = f"{socket.gethostname()}:{os.getpid()}"
+    threads = [threading.Thread(target=_reaper, args=(stop,), daemon=True)]
+    threads += [
+        threading.Thread(target=_loop, args=(f"{prefix}:{i}", stop), name=f"worker-{i}")
+        for i in range(args.concurrency)
+    ]
+    for t in threads:
+        t.start()
+    logger.info("worker %s started, concurrency=%s", prefix, args.concurrency)
+
+    # join с таймаутом, чтобы главный поток успевал обрабатывать сигналы
+    while any(t.is_alive() for t in threads[1:]):
+        for t in threads[1:]:
+            t.join(timeout=1.0)
+    logger.info("worker %s stopped", prefix)
+
+
+if __name__ == "__main__":
+    main()
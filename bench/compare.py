@@ -0,0 +1,34 @@
+"""
+Сравнение двух отчётов bench.run:
+
+    python -m bench.compare bench/results/old.json bench/results/new.json
+"""
+import argparse
+import json
+
+METRICS = ("p50_ms", "p95_ms", "p99_ms", "throughput_rps")
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m bench.compare")
+    parser.add_argument("old")
+    parser.add_argument("new")
+    args = parser.parse_args()
+
+    with open(args.old) as f:
+        old = json.load(f)["scenarios"]
+    with open(args.new) as f:
+        new = json.load(f)["scenarios"]
+
+    print(f"{'scenario':22} " + " ".join(f"{m:>22}" for m in METRICS))
+    for name in sorted(set(old) & set(new)):
+        cells = []
+        for m in METRICS:
+            a, b = old[name][m], new[name][m]
+            delta = (b - a) / a * 100 if a else 0.0
+            cells.append(f"{a:>8} -> {b:>8} {delta:+5.0f}%")
+        print(f"{name:22} " + " ".join(cells))
+
+
+if __name__ == "__main__":
+    main()
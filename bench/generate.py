@@ -0,0 +1,173 @@
+"""
+Генератор синтетических данных для бенчмарков. Только для локальной/стендовой базы!
+
+    python -m bench.generate --applications 100000 [--seed 1] [--truncate]
+
+Заявки, дети и файлы грузятся через COPY потоково (память не растёт с N).
+Файлы ссылаются на небольшой набор blob'ов, которые реально пишутся в STORAGE_ROOT,
+так что сценарий скачивания файлов работает.
+"""
+import argparse
+import hashlib
+import io
+import json
+import random
+import time
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.core.db import engine, SessionLocal
+from app.services.storage_service import blob_rel_path
+from app.services.stats_service import rebuild_stats
+
+OBJECTS = ["Ала-Тоо", "Ихлас", "Жаннат", "Ордо", "Чынар", "Азия Молл"]
+FIRST = ["Айбек", "Нурлан", "Азамат", "Алия", "Айгерим", "Мээрим", "Бакыт", "Дана", "Эрлан", "Сезим"]
+LAST = ["Асанов", "Токтогулов", "Садыков", "Жумабаев", "Исаков", "Омурбеков", "Абдыкадыров"]
+STATUSES = ["NEW"] * 6 + ["APPROVED"] * 3 + ["REJECTED"]
+BLOB_COUNT = 32
+COPY_CHUNK = 5000
+
+
+class _RowStream(io.RawIOBase):
+    """file-like поверх генератора строк для cursor.copy_expert."""
+
+    def __init__(self, rows):
+        self._rows = rows
+        self._buf = b""
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        while len(self._buf) < len(b):
+            try:
+                self._buf += next(self._rows).encode()
+            except StopIteration:
+                break
+        n = min(len(b), len(self._buf))
+        b[:n] = self._buf[:n]
+        self._buf = self._buf[n:]
+        return n
+
+
+def _tsv(*values) -> str:
+    def cell(v):
+        if v is None:
+            return r"\N"
+        return str(v).replace("\\", "\\\\").replace("\t", " ").replace("\n", " ")
+    return "\t".join(cell(v) for v in values) + "\n"
+
+
+def _make_blobs(rnd: random.Random) -> list[tuple[str, int]]:
+    root = Path(settings.STORAGE_ROOT)
+    (root / settings.BIRTH_CERTS_DIR).mkdir(parents=True, exist_ok=True)
+    blobs = []
+    for _ in range(BLOB_COUNT):
+        data = rnd.randbytes(rnd.randint(50_000, 2_000_000))
+        digest = hashlib.sha256(data).hexdigest()
+        path = root / blob_rel_path(digest)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(data)
+        blobs.append((digest, len(data)))
+    return blobs
+
+
+def generate(n: int, seed: int, truncate: bool):
+    rnd = random.Random(seed)
+    blobs = _make_blobs(rnd)
+    now = datetime.utcnow()
+
+    apps_buf, children_buf, files_buf = [], [], []
+
+    def rows():
+        for i in range(n):
+            app_id = uuid.UUID(int=rnd.getrandbits(128), version=4)
+            created = now - timedelta(seconds=rnd.randint(0, 90 * 86400))
+            updated = created + timedelta(seconds=rnd.randint(0, 86400))
+            is_investor = rnd.random() < 0.4
+            objects = rnd.sample(OBJECTS, rnd.randint(1, 2)) if is_investor else []
+            total = rnd.randint(1, 20) if rnd.random() < 0.05 else rnd.randint(1, 4)
+            coming = rnd.randint(0, total)
+            status = rnd.choice(STATUSES)
+            name = f"{rnd.choice(LAST)} {rnd.choice(FIRST)}"
+            yield "app", _tsv(
+                app_id, name, f"+996 {rnd.randint(500, 999)} {rnd.randint(100000, 999999)}",
+                f"user{i}@example.com", is_investor, json.dumps(objects, ensure_ascii=False),
+                f"C-{rnd.randint(1000, 99999)}" if is_investor else None, total, coming, True,
+                status, "Отклонено админом" if status == "REJECTED" else None, created, updated,
+            )
+            for _ in range(total):
+                digest, size = rnd.choice(blobs)
+                file_id = uuid.UUID(int=rnd.getrandbits(128), version=4)
+                yield "file", _tsv(file_id, blob_rel_path(digest), "scan.jpg", "image/jpeg", size, digest, created)
+                yield "child", _tsv(
+                    uuid.UUID(int=rnd.getrandbits(128), version=4), app_id,
+                    f"{name.split()[0]} {rnd.choice(FIRST)}", rnd.randint(0, 17), file_id, None, created, created,
+                )
+
+    raw = engine.raw_connection()
+    try:
+        cur = raw.cursor()
+        if truncate:
+            cur.execute("TRUNCATE children, files, applications, blobs, stats_counters CASCADE")
+
+        started = time.perf_counter()
+        copies = {
+            "app": "COPY applications (id, full_name, whatsapp_phone, email, is_investor, objects, contract_number, "
+                   "children_total, children_coming, consent, status, reject_reason, created_at, updated_at) FROM STDIN",
+            "file": "COPY files (id, storage_path, original_name, mime, size, digest, created_at) FROM STDIN",
+            "child": "COPY children (id, application_id, full_name, age, birth_cert_file_id, birth_cert_file2_id, "
+                     "created_at, updated_at) FROM STDIN",
+        }
+        buffers = {"app": apps_buf, "file": files_buf, "child": children_buf}
+
+        def flush():
+            # порядок важен из-за FK: applications -> files -> children
+            for kind in ("app", "file", "child"):
+                if buffers[kind]:
+                    cur.copy_expert(copies[kind], _RowStream(iter(buffers[kind])))
+                    buffers[kind].clear()
+
+        for count, (kind, line) in enumerate(rows(), 1):
+            buffers[kind].append(line)
+            if count % COPY_CHUNK == 0:
+                flush()
+        flush()
+
+        cur.execute(
+            "INSERT INTO blobs (digest, storage_path, size, ref_count, created_at) "
+            "SELECT digest, min(storage_path), min(size), count(*), now() FROM files "
+            "WHERE digest IS NOT NULL GROUP BY digest "
+            "ON CONFLICT (digest) DO UPDATE SET ref_count = excluded.ref_count"
+        )
+        raw.commit()
+        print(f"loaded {n} applications in {time.perf_counter() - started:.1f}s")
+    finally:
+        raw.close()
+
+    db = SessionLocal()
+    try:
+        rebuild_stats(db)
+        db.execute(text("ANALYZE applications"))
+        db.execute(text("ANALYZE children"))
+        db.execute(text("ANALYZE files"))
+        db.commit()
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m bench.generate")
+    parser.add_argument("--applications", type=int, default=10_000)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--truncate", action="store_true", help="очистить таблицы перед загрузкой")
+    args = parser.parse_args()
+    generate(args.applications, args.seed, args.truncate)
+
+
+if __name__ == "__main__":
+    main()
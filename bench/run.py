@@ -0,0 +1,210 @@
+"""
+Нагрузочные сценарии против запущенного API (база заполнена bench.generate).
+
+    python -m bench.run --base-url http://localhost:8000 --requests 500 --concurrency 16 \
+        --output bench/results/$(git rev-parse --short HEAD).json
+
+Результат — JSON с p50/p95/p99 и throughput по каждому сценарию; сравнение двух
+прогонов: python -m bench.compare old.json new.json
+"""
+import argparse
+import io
+import json
+import os
+import random
+import statistics
+import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+import httpx
+from PIL import Image
+
+FILTERS = {
+    "list_default": {},
+    "list_status": {"status": "NEW"},
+    "list_investor": {"is_investor": "true"},
+    "list_object": {"object": "Ихлас"},
+    "list_phone": {"phone_search": "555"},
+    "list_created": {"created_from": "2026-01-01", "created_to": "2026-12-31"},
+    "list_email": {"email": "user42@example.com"},
+}
+
+
+def _make_jpeg(width: int = 1600, height: int = 1200) -> bytes:
+    """Настоящий JPEG (сотни КБ, как скан): сервер декодирует и уменьшает его при рендере превью."""
+    buf = io.BytesIO()
+    # растянутый шум сжимается плохо — размер близок к реальному документу
+    noise = Image.frombytes("RGB", (width // 8, height // 8), os.urandom(width // 8 * height // 8 * 3))
+    noise.resize((width, height)).save(buf, "JPEG", quality=85)
+    return buf.getvalue()
+
+
+JPEG_STUB = _make_jpeg()
+
+
+class Context:
+    def __init__(self, client: httpx.Client, token: str, rnd: random.Random):
+        self.client = client
+        self.headers = {"Authorization": f"Bearer {token}"}
+        self.rnd = rnd
+        self.app_ids: list[str] = []
+        self.file_ids: list[str] = []
+
+
+def _login(client: httpx.Client, username: str, password: str) -> str:
+    r = client.post("/admin/auth/login", json={"username": username, "password": password})
+    r.raise_for_status()
+    return r.json()["access_token"]
+
+
+def _prepare(ctx: Context):
+    r = ctx.client.get("/admin/applications", params={"per_page": 500, "cursor": "", "count": "none"}, headers=ctx.headers)
+    r.raise_for_status()
+    ctx.app_ids = [item["id"] for item in r.json()["items"]]
+    for app_id in ctx.app_ids[:50]:
+        detail = ctx.client.get(f"/admin/applications/{app_id}", headers=ctx.headers).json()
+        for child in detail.get("children", []):
+            ctx.file_ids.append(child["path_image"].rsplit("/", 1)[-1])
+
+
+def _submit(ctx: Context, children: int):
+    payload = {
+        "full_name": "Бенчмарк Тестов",
+        "whatsapp_phone": "+996 555 000000",
+        "email": f"bench{ctx.rnd.getrandbits(48)}@example.com",
+        "is_investor": False,
+        "objects": [],
+        "children_total": children,
+        "children_coming": children,
+        "consent": True,
+        "children": [{"full_name": f"Ребёнок {i}", "age": 7} for i in range(children)],
+    }
+    files = [("files1", (f"c{i}.jpg", JPEG_STUB, "image/jpeg")) for i in range(children)]
+    return ctx.client.post("/public/applications", data={"payload": json.dumps(payload)}, files=files)
+
+
+def build_scenarios() -> dict:
+    scenarios = {
+        "submit_1_child": lambda ctx: _submit(ctx, 1),
+        "submit_5_children": lambda ctx: _submit(ctx, 5),
+        "submit_20_children": lambda ctx: _submit(ctx, 20),
+        "registration_check": lambda ctx: ctx.client.get(
+            "/public/registrations/check", params={"email": f"user{ctx.rnd.randint(0, 10000)}@example.com"}
+        ),
+        "detail": lambda ctx: ctx.client.get(f"/admin/applications/{ctx.rnd.choice(ctx.app_ids)}", headers=ctx.headers),
+        "file_download": lambda ctx: ctx.client.get(f"/admin/files/{ctx.rnd.choice(ctx.file_ids)}", headers=ctx.headers),
+        "search_name": lambda ctx: ctx.client.get(
+            "/admin/search", params={"q": ctx.rnd.choice(["Асанов", "Айгерим", "Токтог", "Жумабаев Дана"])}, headers=ctx.headers
+        ),
+        "search_phone": lambda ctx: ctx.client.get(
+            "/admin/search", params={"q": f"555 {ctx.rnd.randint(100, 999)}"}, headers=ctx.headers
+        ),
+        "bulk_accept_500": lambda ctx: ctx.client.patch(
+            "/admin/applications-list/accept", json={"uid_list": ctx.rnd.sample(ctx.app_ids, min(500, len(ctx.app_ids)))}, headers=ctx.headers
+        ),
+        "bulk_reject_500": lambda ctx: ctx.client.patch(
+            "/admin/applications-list/reject", json={"uid_list": ctx.rnd.sample(ctx.app_ids, min(500, len(ctx.app_ids)))}, headers=ctx.headers
+        ),
+    }
+    for name, params in FILTERS.items():
+        scenarios[name] = lambda ctx, params=params: ctx.client.get(
+            "/admin/applications", params={"per_page": 100, **params}, headers=ctx.headers
+        )
+    return scenarios
+
+
+def _percentile(sorted_values: list[float], p: float) -> float:
+    if not sorted_values:
+        return 0.0
+    k = min(len(sorted_values) - 1, max(0, round(p / 100 * len(sorted_values)) - 1))
+    return sorted_values[k]
+
+
+def run_scenario(ctx: Context, fn, requests: int, concurrency: int) -> dict:
+    latencies: list[float] = []
+    errors = 0
+
+    def one(_):
+        started = time.perf_counter()
+        try:
+            status = fn(ctx).status_code
+        except httpx.HTTPError:
+            # таймаут/обрыв соединения — такая же ошибка сценария, как 5xx
+            status = None
+        return time.perf_counter() - started, status
+
+    wall = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for elapsed, status in pool.map(one, range(requests)):
+            latencies.append(elapsed)
+            if status is None or status >= 400:
+                errors += 1
+    wall = time.perf_counter() - wall
+
+    latencies.sort()
+    return {
+        "requests": requests,
+        "errors": errors,
+        "throughput_rps": round(requests / wall, 2),
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 2),
+        "p50_ms": round(_percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(_percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(_percentile(latencies, 99) * 1000, 2),
+    }
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], text=True).strip()
+    except Exception:
+        return None
+
+
+def main():
+    scenarios = build_scenarios()
+    parser = argparse.ArgumentParser(prog="python -m bench.run")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--username", default=os.environ.get("ADMIN_USERNAME", "admin"))
+    parser.add_argument("--password", default=os.environ.get("ADMIN_PASSWORD", "admin"))
+    parser.add_argument("--scenarios", default=",".join(scenarios), help="через запятую")
+    parser.add_argument("--requests", type=int, default=200, help="запросов на сценарий")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="куда записать JSON (по умолчанию stdout)")
+    args = parser.parse_args()
+
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    with httpx.Client(base_url=args.base_url, timeout=60, limits=limits) as client:
+        ctx = Context(client, _login(client, args.username, args.password), random.Random(args.seed))
+        _prepare(ctx)
+
+        results = {}
+        for name in args.scenarios.split(","):
+            results[name] = run_scenario(ctx, scenarios[name], args.requests, args.concurrency)
+            print(f"{name:22} p50={results[name]['p50_ms']:>8}ms p99={results[name]['p99_ms']:>8}ms "
+                  f"{results[name]['throughput_rps']:>8} rps errors={results[name]['errors']}", flush=True)
+
+    report = {
+        "meta": {
+            "commit": _git_commit(),
+            "started_at": datetime.now(timezone.utc).isoformat(),
+            "base_url": args.base_url,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "seed": args.seed,
+        },
+        "scenarios": results,
+    }
+    out = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+        with open(args.output, "w") as f:
+            f.write(out)
+    else:
+        print(out)
+
+
+if __name__ == "__main__":
+    main()